@@ -1,17 +1,76 @@
 import asyncio
+import functools
+import mmap
+import os
+import tempfile
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
 import logging
+import numpy as np
 from utils.logger import setup_logger
+from utils.cache import TTLCache
+from utils.serialization import to_json, from_json
+
+try:
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+    _HAVE_GOOGLE = True
+except ImportError:
+    _HAVE_GOOGLE = False
 
 logger = setup_logger(__name__)
 
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+TOKEN_FILE = 'token.json'
+
+# Suggested dinner slots and their availability adjustments
+_SLOT_TIMES = ("18:00", "18:30", "19:00", "19:30", "20:00", "20:30")
+_PEAK_SLOTS = np.array([False, False, True, True, False, False])
+_EDGE_SLOTS = np.array([True, False, False, False, False, True])
+
+# Dedicated pool for blocking Google API calls so parallel agents can't exhaust the default executor
+_GCAL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gcal")
+
+async def _run_blocking(fn, *args, **kwargs):
+    """Run a blocking Google API call on the shared calendar thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_GCAL_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+def _format_calendar_timestamp(dt: datetime) -> str:
+    """Format a datetime as a Google Calendar URL timestamp (YYYYMMDDTHHMMSSZ)"""
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}Z"
+
+def _copy_availability(result: Dict, attendee_emails: List[str]) -> Dict:
+    """Copy of a cached availability result that callers can modify without touching the cache"""
+    return dict(result, time_slots=[dict(slot) for slot in result["time_slots"]],
+                attendee_emails=list(attendee_emails))
+
+def _load_token_info(path: str) -> Optional[Dict]:
+    """Parse a saved OAuth token straight from a read-only memory map"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as token_map:
+            with memoryview(token_map) as token_view:
+                return from_json(token_view)
+
 class CalendarAgent:
+    # Google Calendar accepts at most 50 calls per batch request
+    BATCH_LIMIT = 50
+    
     def __init__(self, config):
         self.config = config
         self.service = None
+        # Availability per (date, attendee set) - reused across slot checks and requests for the same day
+        ttl = config.get("api.calendar.availability_ttl_s", 60) if config else 60
+        self._avail_cache = TTLCache(maxsize=512, ttl=ttl)
         
-    def initialize_calendar_service(self, credentials_data: Dict) -> Dict:
+    async def initialize_calendar_service(self, credentials_data: Dict) -> Dict:
         """Initialize calendar service with proper OAuth flow"""
         try:
             # Check if this is OAuth credentials (not service account)
@@ -22,48 +81,25 @@ class CalendarAgent:
                     "suggestion": "Download OAuth 2.0 credentials from Google Cloud Console > APIs & Services > Credentials > Create Credentials > OAuth 2.0 Client ID"
                 }
             
-            # Try to initialize with OAuth credentials
-            import pickle
-            import os
-            from google.auth.transport.requests import Request
-            from google_auth_oauthlib.flow import InstalledAppFlow
-            from googleapiclient.discovery import build
+            if not _HAVE_GOOGLE:
+                raise ImportError("Google Calendar client libraries are not installed")
             
-            SCOPES = ['https://www.googleapis.com/auth/calendar']
-            
-            creds = None
             # Load existing token if available
-            if os.path.exists('token.pickle'):
-                with open('token.pickle', 'rb') as token:
-                    creds = pickle.load(token)
+            creds = await self._load_cached_credentials()
             
             # If there are no (valid) credentials available, let the user log in
             if not creds or not creds.valid:
                 if creds and creds.expired and creds.refresh_token:
-                    creds.refresh(Request())
+                    await _run_blocking(creds.refresh, Request())
                 else:
-                    # Create temporary credentials file
-                    import tempfile
-                    import json
-                    
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                        json.dump(credentials_data, f)
-                        temp_creds_path = f.name
-                    
-                    try:
-                        flow = InstalledAppFlow.from_client_secrets_file(temp_creds_path, SCOPES)
-                        creds = flow.run_local_server(port=0)
-                        
-                        # Save the credentials for future use
-                        with open('token.pickle', 'wb') as token:
-                            pickle.dump(creds, token)
-                    finally:
-                        os.unlink(temp_creds_path)
-            
-            self.service = build('calendar', 'v3', credentials=creds)
+                    creds = await _run_blocking(self._run_oauth_flow, credentials_data)
+            
+            self.service = await _run_blocking(build, 'calendar', 'v3', credentials=creds)
             
             # Test the service
-            calendar_list = self.service.calendarList().list().execute()
+            calendar_list = await _run_blocking(
+                lambda: self.service.calendarList().list().execute()
+            )
             
             return {
                 "success": True,
@@ -79,11 +115,40 @@ class CalendarAgent:
                 "suggestion": "Make sure you're using OAuth 2.0 credentials, not service account credentials"
             }
     
+    async def _load_cached_credentials(self):
+        """Load the saved OAuth token without blocking the event loop"""
+        if not os.path.exists(TOKEN_FILE):
+            return None
+        
+        token_info = await _run_blocking(_load_token_info, TOKEN_FILE)
+        if not token_info:
+            return None
+        return Credentials.from_authorized_user_info(token_info, SCOPES)
+    
+    def _run_oauth_flow(self, credentials_data: Dict):
+        """Run the interactive OAuth flow and save the token (blocking)"""
+        # Create temporary credentials file
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.json', delete=False) as f:
+            f.write(to_json(credentials_data))
+            temp_creds_path = f.name
+        
+        try:
+            flow = InstalledAppFlow.from_client_secrets_file(temp_creds_path, SCOPES)
+            creds = flow.run_local_server(port=0)
+            
+            # Save the credentials for future use
+            with open(TOKEN_FILE, 'w') as token:
+                token.write(creds.to_json())
+        finally:
+            os.unlink(temp_creds_path)
+        
+        return creds
+    
     async def find_availability(self, date: str, attendee_emails: List[str], session_state: Dict) -> Dict:
         """Find team availability for a given date"""
         try:
             # Parse the date
-            target_date = datetime.strptime(date, "%Y-%m-%d").date()
+            target_date = datetime.fromisoformat(date).date()
             current_date = datetime.now().date()
             
             # Mock availability data (since we're not using real calendar integration)
@@ -97,7 +162,20 @@ class CalendarAgent:
                     'frank@company.com'
                 ])
             
+            # De-duplicate once so the cache key, the counts and the returned list all agree
+            attendee_emails = list(dict.fromkeys(attendee_emails))
+            cache_key = (date, frozenset(attendee_emails))
+            cached = self._avail_cache.get(cache_key)
+            if cached is not None:
+                return _copy_availability(cached, attendee_emails)
+            
             total_attendees = len(attendee_emails)
+            if not total_attendees:
+                return {
+                    "success": False,
+                    "error": "No attendees to check",
+                    "message": "Could not check team availability"
+                }
             
             # Simulate availability based on date and time
             if target_date < current_date:
@@ -116,27 +194,29 @@ class CalendarAgent:
                 available_count = max(3, total_attendees - 2)  # Decent availability far out
                 availability_status = "good"
             
-            # Generate time slot suggestions
-            time_slots = []
-            suggested_times = ["18:00", "18:30", "19:00", "19:30", "20:00", "20:30"]
-            
-            for time in suggested_times:
-                # Adjust availability slightly for different times
-                time_available = available_count
-                if time in ["19:00", "19:30"]:  # Peak dinner times
-                    time_available = min(time_available, total_attendees)
-                elif time in ["18:00", "20:30"]:  # Edge times
-                    time_available = max(1, time_available - 1)
-                
-                time_slots.append({
+            # Generate time slot suggestions - adjust availability for all slots in one pass
+            slot_available = np.full(len(_SLOT_TIMES), available_count)
+            # Peak dinner times are capped at the team size
+            slot_available = np.where(_PEAK_SLOTS, np.minimum(slot_available, total_attendees), slot_available)
+            # Edge times lose one attendee
+            slot_available = np.where(_EDGE_SLOTS, np.maximum(1, slot_available - 1), slot_available)
+            slot_percentages = np.round((slot_available / total_attendees) * 100).astype(int)
+            slot_is_available = slot_available >= total_attendees // 2
+            
+            time_slots = [
+                {
                     "time": time,
                     "available_attendees": time_available,
                     "total_attendees": total_attendees,
-                    "availability_percentage": round((time_available / total_attendees) * 100),
-                    "status": "available" if time_available >= total_attendees // 2 else "limited"
-                })
+                    "availability_percentage": percentage,
+                    "status": "available" if is_available else "limited"
+                }
+                for time, time_available, percentage, is_available in zip(
+                    _SLOT_TIMES, slot_available.tolist(), slot_percentages.tolist(), slot_is_available.tolist()
+                )
+            ]
             
-            return {
+            result = {
                 "success": True,
                 "date": date,
                 "total_attendees": total_attendees,
@@ -146,6 +226,8 @@ class CalendarAgent:
                 "attendee_emails": attendee_emails,
                 "message": f"Found availability for {available_count}/{total_attendees} team members on {date}"
             }
+            self._avail_cache.set(cache_key, result)
+            return _copy_availability(result, attendee_emails)
             
         except Exception as e:
             logger.error(f"Availability check error: {str(e)}")
@@ -160,11 +242,11 @@ class CalendarAgent:
         try:
             # Parse the datetime
             try:
-                start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+                start_dt = datetime.fromisoformat(start_time)
                 end_dt = start_dt + timedelta(hours=2)  # 2-hour event
             except:
                 # Fallback parsing
-                start_dt = datetime.strptime(start_time[:19], "%Y-%m-%dT%H:%M:%S")
+                start_dt = datetime.fromisoformat(start_time[:19])
                 end_dt = start_dt + timedelta(hours=2)
             
             # If we have a working Google Calendar service, try to create real event
@@ -192,19 +274,17 @@ class CalendarAgent:
                         'sendUpdates': 'all'  # Send invitations
                     }
                     
-                    # Create the event
-                    created_event = self.service.events().insert(
-                        calendarId='primary', 
-                        body=event,
-                        sendUpdates='all'
-                    ).execute()
+                    # Create the event (single-entry batch)
+                    created_event = (await self.create_events_batch([event]))[0]
+                    if not created_event.get("success"):
+                        raise Exception(created_event.get("error", "Event insert failed"))
                     
                     return {
                         "success": True,
                         "source": "google_calendar",
                         "event": {
                             "id": created_event.get('id'),
-                            "link": created_event.get('htmlLink'),
+                            "link": created_event.get('link'),
                             "status": created_event.get('status')
                         },
                         "message": "Real Google Calendar event created with invitations"
@@ -224,18 +304,41 @@ class CalendarAgent:
             # Last resort: create basic universal link
             return await self.create_basic_calendar_link(title, start_time)
     
+    async def create_events_batch(self, events: List[Dict]) -> List[Dict]:
+        """Insert several events with batched HTTP requests (one round-trip per 50 events)"""
+        results = {}
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                results[request_id] = {"success": False, "error": str(exception)}
+            else:
+                results[request_id] = {
+                    "success": True,
+                    "id": response.get('id'),
+                    "link": response.get('htmlLink'),
+                    "status": response.get('status')
+                }
+        
+        for start in range(0, len(events), self.BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for i, event in enumerate(events[start:start + self.BATCH_LIMIT], start):
+                batch.add(
+                    self.service.events().insert(calendarId='primary', body=event, sendUpdates='all'),
+                    request_id=str(i)
+                )
+            await _run_blocking(batch.execute)
+        
+        return [
+            results.get(str(i), {"success": False, "error": "No response from batch request"})
+            for i in range(len(events))
+        ]
+    
     async def create_universal_calendar_link(self, title: str, description: str, start_dt: datetime, end_dt: datetime, attendees: List[str]) -> Dict:
         """Create universal calendar link that works across all calendar apps"""
         try:
             # Format dates for Google Calendar URL (YYYYMMDDTHHMMSSZ)
-            start_formatted = start_dt.strftime("%Y%m%dT%H%M%S") + "Z"
-            end_formatted = end_dt.strftime("%Y%m%dT%H%M%S") + "Z"
-            
-            # URL encode the components
-            import urllib.parse
-            
-            title_encoded = urllib.parse.quote(title)
-            description_encoded = urllib.parse.quote(description.replace('\n', ' ')[:500])  # Limit length
+            start_formatted = _format_calendar_timestamp(start_dt)
+            end_formatted = _format_calendar_timestamp(end_dt)
             
             # Create Google Calendar add link
             base_url = "https://calendar.google.com/calendar/render"
@@ -243,14 +346,14 @@ class CalendarAgent:
                 "action": "TEMPLATE",
                 "text": title,
                 "dates": f"{start_formatted}/{end_formatted}",
-                "details": description.replace('\n', ' ')[:500],
+                "details": description.replace('\n', ' ')[:500],  # Limit length
                 "sf": "true",
                 "output": "xml"
             }
             
             # Build URL
-            param_string = "&".join([f"{k}={urllib.parse.quote(str(v))}" for k, v in params.items()])
-            calendar_link = f"{base_url}?{param_string}"
+            query = urllib.parse.urlencode(params, safe='/', quote_via=urllib.parse.quote)
+            calendar_link = f"{base_url}?{query}"
             
             return {
                 "success": True,
@@ -270,8 +373,6 @@ class CalendarAgent:
     async def create_basic_calendar_link(self, title: str, start_time: str) -> Dict:
         """Create basic calendar link as last resort"""
         try:
-            import urllib.parse
-            
             # Simple Google Calendar link
             title_encoded = urllib.parse.quote(title)
             calendar_link = f"https://calendar.google.com/calendar/render?action=TEMPLATE&text={title_encoded}"
@@ -298,15 +399,15 @@ class CalendarAgent:
         """Check availability for specific time slot"""
         try:
             # Parse start time to get date
-            start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            date_str = start_dt.strftime("%Y-%m-%d")
+            start_dt = datetime.fromisoformat(start_time)
+            date_str = start_dt.date().isoformat()
             
             # Use find_availability method
             availability_result = await self.find_availability(date_str, attendees, session_state)
             
             if availability_result.get("success"):
                 # Find the specific time slot
-                requested_time = start_dt.strftime("%H:%M")
+                requested_time = f"{start_dt.hour:02d}:{start_dt.minute:02d}"
                 time_slots = availability_result.get("time_slots", [])
                 
                 # Find closest time slot
@@ -349,6 +450,17 @@ class CalendarAgent:
                     "error": "No team members configured"
                 }
             
+            if self.service:
+                schedules = await self._query_free_busy(date, team_emails)
+                return {
+                    "success": True,
+                    "date": date,
+                    "schedules": schedules,
+                    "total_members": len(team_emails),
+                    "available_members": len([s for s in schedules.values() if s["available"]]),
+                    "message": f"Retrieved schedules for {len(team_emails)} team members"
+                }
+            
             # Mock schedule data for each team member
             schedules = {}
             busy_times = {
@@ -357,15 +469,25 @@ class CalendarAgent:
                 "evening": ["18:00-21:00"]
             }
             
-            for email in team_emails:
-                # Simulate some people being busy at different times
+            # Simulate some people being busy at different times - hash every member
+            # once and derive the morning/afternoon flags in a single vectorized pass
+            member_count = len(team_emails)
+            member_hashes = np.fromiter(
+                (hash((email, date)) for email in team_emails), dtype=np.int64, count=member_count
+            )
+            # Company emails are more likely to be busy during work hours
+            is_company = np.fromiter(
+                (email.endswith('@company.com') for email in team_emails), dtype=bool, count=member_count
+            )
+            busy_morning = is_company & (member_hashes % 3 == 0)
+            busy_afternoon = is_company & (member_hashes % 4 == 0)
+            
+            for email, morning, afternoon in zip(team_emails, busy_morning.tolist(), busy_afternoon.tolist()):
                 member_busy_times = []
-                if email.endswith('@company.com'):
-                    # Company emails are more likely to be busy during work hours
-                    if hash(email + date) % 3 == 0:
-                        member_busy_times.extend(busy_times["morning"])
-                    if hash(email + date) % 4 == 0:
-                        member_busy_times.extend(busy_times["afternoon"])
+                if morning:
+                    member_busy_times.extend(busy_times["morning"])
+                if afternoon:
+                    member_busy_times.extend(busy_times["afternoon"])
                 
                 schedules[email] = {
                     "email": email,
@@ -388,4 +510,36 @@ class CalendarAgent:
             return {
                 "success": False,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+    
+    async def _query_free_busy(self, date: str, team_emails: List[str]) -> Dict:
+        """Fetch busy intervals for all team members with a single FreeBusy query"""
+        # Query the local calendar day, not the UTC one, and show busy times in that zone
+        tz_name = self.config.get("api.calendar.timezone", "Asia/Kolkata") if self.config else "Asia/Kolkata"
+        tz = ZoneInfo(tz_name)
+        day = datetime.fromisoformat(date).date()
+        body = {
+            "timeMin": datetime.combine(day, datetime.min.time(), tzinfo=tz).isoformat(),
+            "timeMax": datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=tz).isoformat(),
+            "timeZone": tz_name,
+            "items": [{"id": email} for email in team_emails]
+        }
+        response = await _run_blocking(self.service.freebusy().query(body=body).execute)
+        calendars = response.get("calendars", {})
+        
+        schedules = {}
+        for email in team_emails:
+            member_busy_times = []
+            for interval in calendars.get(email, {}).get("busy", []):
+                start = datetime.fromisoformat(interval["start"]).astimezone(tz)
+                end = datetime.fromisoformat(interval["end"]).astimezone(tz)
+                member_busy_times.append(f"{start.hour:02d}:{start.minute:02d}-{end.hour:02d}:{end.minute:02d}")
+            
+            schedules[email] = {
+                "email": email,
+                "busy_times": member_busy_times,
+                "available": len(member_busy_times) < 2,
+                "status": "available" if len(member_busy_times) < 2 else "busy"
+            }
+        
+        return schedules
\ No newline at end of file
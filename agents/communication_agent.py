@@ -5,31 +5,139 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 from typing import Dict, List, Any
-import json
+from string import Template
 from datetime import datetime
 
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Static invitation layouts - built once at import, only placeholders are filled per call
+_INVITATION_TEXT_TEMPLATE = Template("""
+Dear Team,
+
+You're invited to our team dinner!
+
+📅 **Event Details:**
+• Date: $date
+• Time: $time
+• Duration: 2 hours
+
+🍽️ **Restaurant Information:**
+• Name: $restaurant_name
+• Address: $address
+• Cuisine: $cuisine
+• Rating: $rating ⭐
+
+📋 **Reservation Details:**
+• Confirmation: $confirmation
+• Method: $method
+• Party Size: $party_size people
+
+$reservation_instructions
+
+Please confirm your attendance by responding to this email or updating the calendar event.
+
+Looking forward to a great evening together!
+
+Best regards,
+Your Proactive Work-Life Assistant 🤖
+        """)
+
+# Invitation stylesheet - kept separate so the markup template stays readable
+_INVITATION_CSS = """\
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                   color: white; padding: 20px; text-align: center; }
+        .content { padding: 20px; }
+        .section { margin: 20px 0; padding: 15px; border-left: 4px solid #667eea; 
+                   background: #f8f9fa; }
+        .restaurant-info { background: #e8f5e8; }
+        .reservation-info { background: #fff3cd; }
+        .footer { text-align: center; color: #666; margin-top: 30px; }
+        .emoji { font-size: 1.2em; }
+"""
+
+_INVITATION_HTML_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+""" + _INVITATION_CSS + """\
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>🍽️ Team Dinner Invitation</h1>
+        <h2>$restaurant_name</h2>
+    </div>
+    
+    <div class="content">
+        <div class="section">
+            <h3>📅 Event Details</h3>
+            <p><strong>Date:</strong> $date</p>
+            <p><strong>Time:</strong> $time</p>
+            <p><strong>Duration:</strong> 2 hours</p>
+        </div>
+        
+        <div class="section restaurant-info">
+            <h3>🍽️ Restaurant Information</h3>
+            <p><strong>Name:</strong> $restaurant_name</p>
+            <p><strong>Address:</strong> $address</p>
+            <p><strong>Cuisine:</strong> $cuisine</p>
+            <p><strong>Rating:</strong> $rating ⭐</p>
+        </div>
+        
+        <div class="section reservation-info">
+            <h3>📋 Reservation Details</h3>
+            <p><strong>Confirmation:</strong> $confirmation</p>
+            <p><strong>Method:</strong> $method</p>
+            <p><strong>Party Size:</strong> $party_size people</p>
+        </div>
+        
+        <div class="footer">
+            <p>Please confirm your attendance by responding to this email.</p>
+            <p><em>Sent by your Proactive Work-Life Assistant 🤖</em></p>
+        </div>
+    </div>
+</body>
+</html>
+        """)
+
 class CommunicationAgent:
     """Agent responsible for sending invitations and communications"""
     
     def __init__(self, config):
         self.config = config
+        # Cap concurrent sends so large attendee lists don't exhaust connections
+        max_sends = config.get("communication.max_concurrent_sends", 16) if config else 16
+        self._send_sem = asyncio.Semaphore(max_sends)
+        # Simulated network latency per send; 0 disables it (set it explicitly for demos)
+        self._send_delay = config.get("communication.simulate_email_delay_s", 0.0) if config else 0.0
         
     async def send_invitations(self, event_details: Dict, restaurant_details: Dict,
                              reservation_details: Dict, session_state: Dict) -> Dict:
         """Send calendar invitations and notification emails"""
         try:
+            attendees = event_details.get("attendees") or []
+            
+            # Nothing to render or send for solo events
+            if not attendees:
+                return {
+                    "success": True,
+                    "message": "No attendees - skipped invitations",
+                    "email_results": [],
+                    "summary": self.create_communication_summary([], event_details)
+                }
+            
             # Prepare invitation content
-            invitation_content = self.create_invitation_content(
+            invitation_content = self._build_invitation(
                 event_details, restaurant_details, reservation_details
             )
             
             # Send emails to attendees
             email_results = await self.send_email_notifications(
-                invitation_content, event_details.get("attendees", []), session_state
+                invitation_content, attendees, session_state
             )
             
             # Create summary message
@@ -49,51 +157,44 @@ class CommunicationAgent:
                 "message": f"Failed to send invitations: {str(e)}"
             }
     
-    def create_invitation_content(self, event_details: Dict, restaurant_details: Dict,
-                                reservation_details: Dict) -> Dict:
-        """Create structured invitation content"""
+    def _build_invitation(self, event_details: Dict, restaurant_details: Dict,
+                          reservation_details: Dict) -> Dict:
+        """Create subject, plain-text and HTML invitation content in one pass"""
+        restaurant_name = restaurant_details['name']
         
-        # Email subject
-        subject = f"🍽️ Team Dinner Invitation - {restaurant_details['name']}"
+        # Parse the start time once for both the text and HTML versions
+        date_str, time_str = self._parse_start_time(event_details.get('start_time', ''))
         
-        # Email body
-        body = f"""
-Dear Team,
-
-You're invited to our team dinner!
-
-📅 **Event Details:**
-• Date: {event_details.get('start_time', '').split('T')[0]}
-• Time: {event_details.get('start_time', '').split('T')[1][:5] if 'T' in event_details.get('start_time', '') else 'TBD'}
-• Duration: 2 hours
-
-🍽️ **Restaurant Information:**
-• Name: {restaurant_details['name']}
-• Address: {restaurant_details.get('address', 'Address will be shared')}
-• Cuisine: {', '.join(restaurant_details.get('cuisine', ['Various']))}
-• Rating: {restaurant_details.get('rating', 'N/A')} ⭐
-
-📋 **Reservation Details:**
-• Confirmation: {reservation_details.get('confirmation', 'Pending')}
-• Method: {reservation_details.get('method', 'Manual')}
-• Party Size: {event_details.get('party_size', 'TBD')} people
-
-{self._get_reservation_instructions(reservation_details)}
-
-Please confirm your attendance by responding to this email or updating the calendar event.
-
-Looking forward to a great evening together!
-
-Best regards,
-Your Proactive Work-Life Assistant 🤖
-        """
+        # Fields shared by both templates, read from the details dicts once
+        fields = {
+            "restaurant_name": restaurant_name,
+            "date": date_str,
+            "time": time_str,
+            "address": restaurant_details.get('address', 'Address will be shared'),
+            "cuisine": ', '.join(restaurant_details.get('cuisine', ['Various'])),
+            "rating": restaurant_details.get('rating', 'N/A'),
+            "confirmation": reservation_details.get('confirmation', 'Pending'),
+            "method": reservation_details.get('method', 'Manual'),
+            "party_size": event_details.get('party_size', 'TBD')
+        }
         
         return {
-            "subject": subject,
-            "body": body,
-            "html_body": self.create_html_invitation(event_details, restaurant_details, reservation_details)
+            "subject": f"🍽️ Team Dinner Invitation - {restaurant_name}",
+            "body": _INVITATION_TEXT_TEMPLATE.substitute(
+                fields, reservation_instructions=self._get_reservation_instructions(reservation_details)
+            ),
+            "html_body": _INVITATION_HTML_TEMPLATE.substitute(fields)
         }
     
+    def _parse_start_time(self, start_time: str) -> tuple:
+        """Split an ISO start time into display date and HH:MM time"""
+        try:
+            start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+        except ValueError:
+            return start_time.split('T')[0], 'TBD'
+        
+        return start_dt.date().isoformat(), start_dt.strftime('%H:%M') if 'T' in start_time else 'TBD'
+    
     def _get_reservation_instructions(self, reservation_details: Dict) -> str:
         """Get reservation-specific instructions"""
         if reservation_details.get("method") == "manual":
@@ -112,95 +213,37 @@ Suggested script: "{instructions.get('script', 'Please make a reservation for ou
         
         return ""
     
-    def create_html_invitation(self, event_details: Dict, restaurant_details: Dict,
-                             reservation_details: Dict) -> str:
-        """Create HTML version of the invitation"""
-        
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                   color: white; padding: 20px; text-align: center; }}
-        .content {{ padding: 20px; }}
-        .section {{ margin: 20px 0; padding: 15px; border-left: 4px solid #667eea; 
-                   background: #f8f9fa; }}
-        .restaurant-info {{ background: #e8f5e8; }}
-        .reservation-info {{ background: #fff3cd; }}
-        .footer {{ text-align: center; color: #666; margin-top: 30px; }}
-        .emoji {{ font-size: 1.2em; }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>🍽️ Team Dinner Invitation</h1>
-        <h2>{restaurant_details['name']}</h2>
-    </div>
-    
-    <div class="content">
-        <div class="section">
-            <h3>📅 Event Details</h3>
-            <p><strong>Date:</strong> {event_details.get('start_time', '').split('T')[0]}</p>
-            <p><strong>Time:</strong> {event_details.get('start_time', '').split('T')[1][:5] if 'T' in event_details.get('start_time', '') else 'TBD'}</p>
-            <p><strong>Duration:</strong> 2 hours</p>
-        </div>
-        
-        <div class="section restaurant-info">
-            <h3>🍽️ Restaurant Information</h3>
-            <p><strong>Name:</strong> {restaurant_details['name']}</p>
-            <p><strong>Address:</strong> {restaurant_details.get('address', 'Address will be shared')}</p>
-            <p><strong>Cuisine:</strong> {', '.join(restaurant_details.get('cuisine', ['Various']))}</p>
-            <p><strong>Rating:</strong> {restaurant_details.get('rating', 'N/A')} ⭐</p>
-        </div>
-        
-        <div class="section reservation-info">
-            <h3>📋 Reservation Details</h3>
-            <p><strong>Confirmation:</strong> {reservation_details.get('confirmation', 'Pending')}</p>
-            <p><strong>Method:</strong> {reservation_details.get('method', 'Manual')}</p>
-            <p><strong>Party Size:</strong> {event_details.get('party_size', 'TBD')} people</p>
-        </div>
-        
-        <div class="footer">
-            <p>Please confirm your attendance by responding to this email.</p>
-            <p><em>Sent by your Proactive Work-Life Assistant 🤖</em></p>
-        </div>
-    </div>
-</body>
-</html>
-        """
-        
-        return html
-    
     async def send_email_notifications(self, content: Dict, attendees: List[str],
                                      session_state: Dict) -> List[Dict]:
         """Send email notifications to attendees"""
         email_results = []
-        
+
         # For demo purposes, we'll simulate email sending
         # In production, you'd integrate with actual email services
-        
-        for attendee in attendees:
-            try:
-                # Simulate email sending
-                result = await self.simulate_email_send(attendee, content)
-                email_results.append(result)
-                
-            except Exception as e:
-                logger.error(f"Failed to send email to {attendee}: {str(e)}")
+
+        # Send to all attendees concurrently so total time is one round-trip, not N
+        tasks = [self.simulate_email_send(attendee, content) for attendee in attendees]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for attendee, result in zip(attendees, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to send email to {attendee}: {str(result)}")
                 email_results.append({
                     "recipient": attendee,
                     "success": False,
-                    "error": str(e)
+                    "error": str(result)
                 })
-        
+            else:
+                email_results.append(result)
+
         return email_results
     
     async def simulate_email_send(self, recipient: str, content: Dict) -> Dict:
         """Simulate email sending for demo purposes"""
-        # Simulate network delay
-        await asyncio.sleep(0.5)
+        async with self._send_sem:
+            # Simulate network delay
+            if self._send_delay:
+                await asyncio.sleep(self._send_delay)
         
         return {
             "recipient": recipient,
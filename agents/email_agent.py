@@ -1,79 +1,266 @@
+import asyncio
+import re
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime
-import streamlit as st
-from typing import Dict
+from email.message import EmailMessage
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from agents.smtp_pool import connection_lost, smtp_pool
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Known team members by first name - extend here as the team grows
+NAME_TO_EMAIL = {
+    "mayank": "mayank2712005@gmail.com",
+}
+TEAM_EMAILS = tuple(NAME_TO_EMAIL.values()) + (
+    "team1@company.com",
+    "team2@company.com",
+    "team3@company.com",
+    "team4@company.com",
+    "team5@company.com"
+)
+WORD_RE = re.compile(r'[a-z]+')
+
+# Team-wide phrases, compiled once at import
+TEAM_RE = re.compile(r'all team|team members|entire team|whole team')
+
+# Email type signals: token -> (type, weight). Specific words outweigh generic ones like "meeting"
+KEYWORD_TO_TYPE = {
+    "birthday": ("birthday_wishes", 5),
+    "birthdays": ("birthday_wishes", 5),
+    "bday": ("birthday_wishes", 5),
+    "wishes": ("birthday_wishes", 3),
+    "celebration": ("birthday_wishes", 3),
+    "urgent": ("urgent_meeting", 4),
+    "urgently": ("urgent_meeting", 4),
+    "immediate": ("urgent_meeting", 3),
+    "immediately": ("urgent_meeting", 3),
+    "meeting": ("urgent_meeting", 2),
+    "meetings": ("urgent_meeting", 2),
+    "notification": ("team_notification", 2),
+    "inform": ("team_notification", 2),
+    "informed": ("team_notification", 2),
+    "announce": ("team_notification", 2),
+    "announcement": ("team_notification", 2),
+    "update": ("team_notification", 2),
+    "updates": ("team_notification", 2)
+}
+
+# Fixed subject for the urgent meeting blast - one message per request, so its header is encoded once
+URGENT_SUBJECT = "🚨 URGENT: Team Meeting Required - Immediate Response Needed"
+
+# Email layouts - static markup lives here, only the {placeholders} are filled per send
+URGENT_HTML = """
+            <html>
+            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+                <div style="background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%); color: white; padding: 2rem; border-radius: 15px; text-align: center; margin-bottom: 2rem;">
+                    <h1 style="margin: 0;">🚨 URGENT MEETING</h1>
+                    <h2 style="margin: 0.5rem 0 0 0;">Immediate Response Required</h2>
+                </div>
+                
+                <div style="background: #fff3cd; border-left: 5px solid #ffc107; padding: 1.5rem; margin: 1.5rem 0;">
+                    <h3 style="margin-top: 0; color: #856404;">⚡ High Priority Notification</h3>
+                    <p style="margin-bottom: 0; font-weight: bold;">This meeting requires your immediate attention and response.</p>
+                </div>
+                
+                <div style="background: #f8f9fa; padding: 2rem; border-radius: 12px; margin: 2rem 0;">
+                    <h3>Dear Team,</h3>
+                    <p>I hope this email finds you well. Due to urgent matters that require immediate attention, we need to schedule an emergency team meeting.</p>
+                    
+                    <h3>📋 Meeting Details:</h3>
+                    <ul style="background: white; padding: 1rem; border-radius: 8px; border: 1px solid #dee2e6;">
+                        <li><strong>📅 Date:</strong> As soon as possible (today if available)</li>
+                        <li><strong>🕐 Time:</strong> To be confirmed based on team availability</li>
+                        <li><strong>📍 Location:</strong> To be announced</li>
+                        <li><strong>🎯 Priority:</strong> HIGH - Immediate response required</li>
+                    </ul>
+                    
+                    <h3>✅ What's Needed From You:</h3>
+                    <ol style="background: white; padding: 1rem; border-radius: 8px; border: 1px solid #dee2e6;">
+                        <li>Please reply with your immediate availability for today</li>
+                        <li>Check your calendar for the next 2-3 hours</li>
+                        <li>Come prepared for an important discussion</li>
+                    </ol>
+                    
+                    <h3>🚀 Next Steps:</h3>
+                    <ul style="background: white; padding: 1rem; border-radius: 8px; border: 1px solid #dee2e6;">
+                        <li>I will send calendar invites once we confirm the time</li>
+                        <li>Please acknowledge receipt of this email</li>
+                        <li>Contact me directly if you have any urgent conflicts</li>
+                    </ul>
+                </div>
+                
+                <div style="background: #d1ecf1; border: 1px solid #bee5eb; border-radius: 10px; padding: 1rem; margin: 2rem 0; text-align: center;">
+                    <p style="margin: 0; font-weight: bold; color: #0c5460;">
+                        Thank you for your immediate attention to this matter.
+                    </p>
+                </div>
+                
+                <div style="text-align: center; margin-top: 2rem;">
+                    <p>Best regards,<br>
+                    <strong>{current_user}</strong><br>
+                    <em>Sent via ProActive Work-Life Assistant</em></p>
+                    
+                    <p style="font-size: 0.9rem; color: #666; margin-top: 1rem;">
+                        Sent on: {sent_at} UTC
+                    </p>
+                </div>
+            </body>
+            </html>
+            """
+
+BIRTHDAY_HTML = """
+            <html>
+            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 2rem; border-radius: 15px; text-align: center; margin-bottom: 2rem;">
+                    <h1 style="margin: 0;">🎉 Happy Birthday!</h1>
+                    <h2 style="margin: 0.5rem 0 0 0;">Dear {recipient}</h2>
+                </div>
+                
+                <div style="background: #f8f9fa; padding: 2rem; border-radius: 12px; margin: 2rem 0;">
+                    <p style="font-size: 1.1rem; margin-bottom: 1.5rem;">
+                        🎂 Wishing you a very happy birthday filled with joy, laughter, and wonderful memories!
+                    </p>
+                    
+                    <p style="margin-bottom: 1.5rem;">
+                        🎁 May this new year of life bring you success, happiness, and all the things you've been hoping for.
+                    </p>
+                    
+                    <p style="margin-bottom: 1.5rem;">
+                        🌟 Thank you for being such an amazing team member. Your contributions make our workplace better every day!
+                    </p>
+                    
+                    <div style="text-align: center; margin: 2rem 0;">
+                        <div style="background: #fff3cd; border: 2px solid #ffeaa7; border-radius: 10px; padding: 1rem; display: inline-block;">
+                            <p style="margin: 0; font-size: 1.2rem; color: #856404;">
+                                🎈 Enjoy your special day! 🎈
+                            </p>
+                        </div>
+                    </div>
+                </div>
+                
+                <div style="text-align: center; margin-top: 2rem;">
+                    <p>Best wishes,<br>
+                    <strong>{current_user}</strong><br>
+                    <em>Sent via ProActive Work-Life Assistant</em></p>
+                    
+                    <p style="font-size: 0.9rem; color: #666; margin-top: 1rem;">
+                        Sent on: {sent_at} UTC
+                    </p>
+                </div>
+            </body>
+            </html>
+            """
+
+def _build_message(sender_email: str, to: str, subject: str, html_content: str) -> EmailMessage:
+    """Build an HTML email with the modern EmailMessage API"""
+    msg = EmailMessage()
+    msg['From'] = sender_email
+    msg['To'] = to
+    msg['Subject'] = subject
+    msg.set_content(html_content, subtype='html')
+    return msg
 
 class EmailCommunicationAgent:
+    # Streamlit session state is passed in by the caller - this module never imports streamlit
+    # current_time is a property, so the only per-instance state is the user
+    __slots__ = ('current_user',)
+    
     def __init__(self):
-        self.current_time = datetime(2025, 7, 21, 14, 42, 57)
         self.current_user = "A4xMimic"
     
+    @property
+    def current_time(self) -> datetime:
+        """Current UTC time - evaluated on access instead of frozen at init"""
+        return datetime.now(timezone.utc)
+    
+    def _now_str(self) -> str:
+        """Display timestamp used in email bodies and summaries"""
+        return self.current_time.strftime('%Y-%m-%d %H:%M:%S')
+    
     async def process_email_request(self, user_input: str, session_state) -> Dict:
         """Process email communication requests"""
         
         # Extract recipient and message type
-        analysis = self._analyze_email_request(user_input)
+        analysis = self._analyze_email_request(user_input, user_input.lower())
+        
+        # Format the timestamp once; every handler below shows the same value
+        now_str = self._now_str()
         
         if analysis["type"] == "birthday_wishes":
-            return await self._send_birthday_wishes(analysis, session_state)
+            return await self._send_birthday_wishes(analysis, session_state, now_str)
         elif analysis["type"] == "urgent_meeting":
-            return await self._send_urgent_meeting_email(analysis, session_state)
+            return await self._send_urgent_meeting_email(analysis, session_state, now_str)
         elif analysis["type"] == "team_notification":
-            return await self._send_team_notification(analysis, session_state)
+            return await self._send_team_notification(analysis, session_state, now_str)
         elif analysis["type"] == "general_email":
-            return await self._send_general_email(analysis, session_state)
+            return await self._send_general_email(analysis, session_state, now_str)
         else:
             return {
                 "type": "error",
                 "content": "Could not understand the email request. Please specify the recipient and message type."
             }
     
-    def _analyze_email_request(self, user_input: str) -> Dict:
+    def _analyze_email_request(self, user_input: str, user_lower: str) -> Dict:
         """Analyze the email request to extract details"""
-        user_lower = user_input.lower()
-        
         # Extract recipient information
         recipients = []
-        recipient_emails = []
+        # Collected as a set so overlapping triggers (a name plus "all team") never double-send
+        recipient_emails = set()
         
-        # Check for specific team members
-        if "mayank" in user_lower:
-            recipients.append("Mayank")
-            recipient_emails.append("mayank2712005@gmail.com")
+        # Check for specific team members - whole-word lookups in the alias table
+        tokens = set(WORD_RE.findall(user_lower))
+        for name in sorted(tokens & NAME_TO_EMAIL.keys()):
+            recipients.append(name.title())
+            recipient_emails.add(NAME_TO_EMAIL[name])
         
         # Check for team-wide emails
-        if any(phrase in user_lower for phrase in ["all team", "team members", "entire team", "whole team"]):
+        if TEAM_RE.search(user_lower):
             recipients = ["All Team Members"]
             # Get team emails from session state or use default
-            recipient_emails = [
-                "mayank2712005@gmail.com",
-                "team1@company.com",
-                "team2@company.com", 
-                "team3@company.com",
-                "team4@company.com",
-                "team5@company.com"
-            ]
+            recipient_emails.update(TEAM_EMAILS)
         
-        # Determine email type based on content
-        email_type = "general_email"  # default
+        # Determine email type based on content - one scored pass over the tokens
+        # (insertion order breaks ties: birthday, then urgent, then notification)
+        scores = {"birthday_wishes": 0, "urgent_meeting": 0, "team_notification": 0}
+        for token in tokens:
+            signal = KEYWORD_TO_TYPE.get(token)
+            if signal:
+                scores[signal[0]] += signal[1]
         
-        if any(word in user_lower for word in ["birthday", "wishes", "bday", "celebration"]):
-            email_type = "birthday_wishes"
-        elif any(phrase in user_lower for phrase in ["urgent meeting", "urgent", "meeting", "immediate"]):
-            email_type = "urgent_meeting"
-        elif any(phrase in user_lower for phrase in ["notification", "inform", "announce", "update"]):
-            email_type = "team_notification"
+        best_type = max(scores, key=scores.get)
+        email_type = best_type if scores[best_type] else "general_email"
         
         return {
             "type": email_type,
             "recipients": recipients,
-            "recipient_emails": recipient_emails,
+            "recipient_emails": sorted(recipient_emails),
             "original_request": user_input
         }
     
-    async def _send_urgent_meeting_email(self, analysis: Dict, session_state) -> Dict:
+    def _deliver(self, session_state, msg: EmailMessage, recipient_emails: List[str]) -> Dict:
+        """Send one message to all recipients over a pooled connection; returns refused addresses"""
+        sender_email = session_state.get('email_address')
+        
+        # Reuse a pooled, already-authenticated connection instead of a fresh TLS handshake
+        for attempt in range(2):
+            try:
+                with smtp_pool.acquire(session_state.get('smtp_server'), session_state.get('smtp_port'),
+                                       sender_email, session_state.get('email_password')) as server:
+                    try:
+                        return server.sendmail(sender_email, recipient_emails, msg.as_bytes())
+                    except smtplib.SMTPRecipientsRefused as email_error:
+                        # Raised only when every recipient was rejected
+                        return email_error.recipients
+            except smtplib.SMTPException as smtp_error:
+                # The server dropped a pooled connection - the pool has closed it, so retry once on a fresh one
+                if attempt or not connection_lost(smtp_error):
+                    raise
+                logger.info(f"SMTP connection lost ({smtp_error}), reconnecting")
+    
+    async def _send_urgent_meeting_email(self, analysis: Dict, session_state, now_str: str) -> Dict:
         """Send urgent meeting notification email"""
         try:
             recipients = analysis["recipients"]
@@ -95,7 +282,7 @@ class EmailCommunicationAgent:
 - **To:** {', '.join(recipients)}
 - **Recipients:** {len(recipient_emails)} team members
 - **From:** {self.current_user}
-- **Time:** {self.current_time.strftime('%Y-%m-%d %H:%M:%S')} UTC
+- **Time:** {now_str} UTC
 
 **📝 Email Content Preview:**
 ---
@@ -137,94 +324,28 @@ Try: "Schedule urgent team meeting for today"
                 }
             
             # If email is configured, send actual email
-            subject = "🚨 URGENT: Team Meeting Required - Immediate Response Needed"
+            subject = URGENT_SUBJECT
             
-            html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-                <div style="background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%); color: white; padding: 2rem; border-radius: 15px; text-align: center; margin-bottom: 2rem;">
-                    <h1 style="margin: 0;">🚨 URGENT MEETING</h1>
-                    <h2 style="margin: 0.5rem 0 0 0;">Immediate Response Required</h2>
-                </div>
-                
-                <div style="background: #fff3cd; border-left: 5px solid #ffc107; padding: 1.5rem; margin: 1.5rem 0;">
-                    <h3 style="margin-top: 0; color: #856404;">⚡ High Priority Notification</h3>
-                    <p style="margin-bottom: 0; font-weight: bold;">This meeting requires your immediate attention and response.</p>
-                </div>
-                
-                <div style="background: #f8f9fa; padding: 2rem; border-radius: 12px; margin: 2rem 0;">
-                    <h3>Dear Team,</h3>
-                    <p>I hope this email finds you well. Due to urgent matters that require immediate attention, we need to schedule an emergency team meeting.</p>
-                    
-                    <h3>📋 Meeting Details:</h3>
-                    <ul style="background: white; padding: 1rem; border-radius: 8px; border: 1px solid #dee2e6;">
-                        <li><strong>📅 Date:</strong> As soon as possible (today if available)</li>
-                        <li><strong>🕐 Time:</strong> To be confirmed based on team availability</li>
-                        <li><strong>📍 Location:</strong> To be announced</li>
-                        <li><strong>🎯 Priority:</strong> HIGH - Immediate response required</li>
-                    </ul>
-                    
-                    <h3>✅ What's Needed From You:</h3>
-                    <ol style="background: white; padding: 1rem; border-radius: 8px; border: 1px solid #dee2e6;">
-                        <li>Please reply with your immediate availability for today</li>
-                        <li>Check your calendar for the next 2-3 hours</li>
-                        <li>Come prepared for an important discussion</li>
-                    </ol>
-                    
-                    <h3>🚀 Next Steps:</h3>
-                    <ul style="background: white; padding: 1rem; border-radius: 8px; border: 1px solid #dee2e6;">
-                        <li>I will send calendar invites once we confirm the time</li>
-                        <li>Please acknowledge receipt of this email</li>
-                        <li>Contact me directly if you have any urgent conflicts</li>
-                    </ul>
-                </div>
-                
-                <div style="background: #d1ecf1; border: 1px solid #bee5eb; border-radius: 10px; padding: 1rem; margin: 2rem 0; text-align: center;">
-                    <p style="margin: 0; font-weight: bold; color: #0c5460;">
-                        Thank you for your immediate attention to this matter.
-                    </p>
-                </div>
-                
-                <div style="text-align: center; margin-top: 2rem;">
-                    <p>Best regards,<br>
-                    <strong>{self.current_user}</strong><br>
-                    <em>Sent via ProActive Work-Life Assistant</em></p>
-                    
-                    <p style="font-size: 0.9rem; color: #666; margin-top: 1rem;">
-                        Sent on: {self.current_time.strftime('%Y-%m-%d %H:%M:%S')} UTC
-                    </p>
-                </div>
-            </body>
-            </html>
-            """
+            html_content = URGENT_HTML.format_map({
+                'current_user': self.current_user,
+                'sent_at': now_str
+            })
             
             # Send email to all recipients
-            smtp_server = session_state.get('smtp_server')
-            smtp_port = session_state.get('smtp_port')
             sender_email = session_state.get('email_address')
-            sender_password = session_state.get('email_password')
             
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(sender_email, sender_password)
+            # The body is identical for everyone, so build it once and send a single DATA
+            msg = _build_message(sender_email, ', '.join(recipient_emails), subject, html_content)
             
-            sent_count = 0
-            for recipient_email in recipient_emails:
-                try:
-                    msg = MIMEMultipart('alternative')
-                    msg['From'] = sender_email
-                    msg['To'] = recipient_email
-                    msg['Subject'] = subject
-                    
-                    html_part = MIMEText(html_content, 'html')
-                    msg.attach(html_part)
-                    
-                    server.send_message(msg)
-                    sent_count += 1
-                except Exception as email_error:
-                    print(f"Failed to send to {recipient_email}: {email_error}")
+            # SMTP is blocking - run it off the event loop so the UI stays responsive
+            refused = await asyncio.to_thread(self._deliver, session_state, msg, recipient_emails)
             
-            server.quit()
+            # Collect per-address failures and log them once instead of printing each
+            failed = [(recipient_email, str(email_error)) for recipient_email, email_error in refused.items()]
+            if failed:
+                logger.warning(f"SMTP failures: {failed}")
+            
+            sent_count = len(recipient_emails) - len(failed)
             
             return {
                 "type": "text",
@@ -235,7 +356,7 @@ Try: "Schedule urgent team meeting for today"
 - **👥 Recipients:** {', '.join(recipients)}
 - **📬 Subject:** {subject}
 - **📤 Sent to:** {sent_count}/{len(recipient_emails)} team members
-- **🕐 Sent at:** {self.current_time.strftime('%Y-%m-%d %H:%M:%S')} UTC
+- **🕐 Sent at:** {now_str} UTC
 - **👤 From:** {self.current_user}
 
 **🎯 Mission Status:** URGENT notification delivered!
@@ -249,7 +370,8 @@ Try: "Schedule urgent team meeting for today"
 **💡 Pro Tip:** Use "Schedule urgent team meeting for today" to create calendar event once time is confirmed.
 
 🚨 **Urgent meeting notification sent to entire team!**
-                """
+                """,
+                "failed": failed
             }
             
         except Exception as e:
@@ -258,7 +380,7 @@ Try: "Schedule urgent team meeting for today"
                 "content": f"❌ Failed to send urgent meeting email: {str(e)}"
             }
     
-    async def _send_team_notification(self, analysis: Dict, session_state) -> Dict:
+    async def _send_team_notification(self, analysis: Dict, session_state, now_str: str) -> Dict:
         """Send general team notification"""
         return {
             "type": "text",
@@ -273,13 +395,13 @@ Try: "Schedule urgent team meeting for today"
 - 🎉 Celebration notices
 - 📋 Policy updates
 
-**Current Time:** {self.current_time.strftime('%Y-%m-%d %H:%M:%S')} UTC
+**Current Time:** {now_str} UTC
 
 💡 **Configure SMTP settings in sidebar to send real emails!**
             """
         }
     
-    async def _send_general_email(self, analysis: Dict, session_state) -> Dict:
+    async def _send_general_email(self, analysis: Dict, session_state, now_str: str) -> Dict:
         """FIXED: Handle general email requests"""
         return {
             "type": "text",
@@ -294,7 +416,7 @@ Try: "Schedule urgent team meeting for today"
 - 📢 Team announcements ✅
 - 📧 General communications ✅
 
-**Current Time:** {self.current_time.strftime('%Y-%m-%d %H:%M:%S')} UTC
+**Current Time:** {now_str} UTC
 
 💡 **To send emails:** Configure SMTP settings in sidebar first!
 
@@ -305,7 +427,7 @@ Try: "Schedule urgent team meeting for today"
             """
         }
     
-    async def _send_birthday_wishes(self, analysis: Dict, session_state) -> Dict:
+    async def _send_birthday_wishes(self, analysis: Dict, session_state, now_str: str) -> Dict:
         """Send birthday wishes email"""
         try:
             recipient = analysis["recipients"][0] if analysis["recipients"] else "Team Member"
@@ -327,69 +449,20 @@ Try: "Schedule urgent team meeting for today"
             # Prepare birthday email
             subject = f"🎂 Happy Birthday {recipient.title()}!"
             
-            html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 2rem; border-radius: 15px; text-align: center; margin-bottom: 2rem;">
-                    <h1 style="margin: 0;">🎉 Happy Birthday!</h1>
-                    <h2 style="margin: 0.5rem 0 0 0;">Dear {recipient.title()}</h2>
-                </div>
-                
-                <div style="background: #f8f9fa; padding: 2rem; border-radius: 12px; margin: 2rem 0;">
-                    <p style="font-size: 1.1rem; margin-bottom: 1.5rem;">
-                        🎂 Wishing you a very happy birthday filled with joy, laughter, and wonderful memories!
-                    </p>
-                    
-                    <p style="margin-bottom: 1.5rem;">
-                        🎁 May this new year of life bring you success, happiness, and all the things you've been hoping for.
-                    </p>
-                    
-                    <p style="margin-bottom: 1.5rem;">
-                        🌟 Thank you for being such an amazing team member. Your contributions make our workplace better every day!
-                    </p>
-                    
-                    <div style="text-align: center; margin: 2rem 0;">
-                        <div style="background: #fff3cd; border: 2px solid #ffeaa7; border-radius: 10px; padding: 1rem; display: inline-block;">
-                            <p style="margin: 0; font-size: 1.2rem; color: #856404;">
-                                🎈 Enjoy your special day! 🎈
-                            </p>
-                        </div>
-                    </div>
-                </div>
-                
-                <div style="text-align: center; margin-top: 2rem;">
-                    <p>Best wishes,<br>
-                    <strong>{self.current_user}</strong><br>
-                    <em>Sent via ProActive Work-Life Assistant</em></p>
-                    
-                    <p style="font-size: 0.9rem; color: #666; margin-top: 1rem;">
-                        Sent on: {self.current_time.strftime('%Y-%m-%d %H:%M:%S')} UTC
-                    </p>
-                </div>
-            </body>
-            </html>
-            """
+            html_content = BIRTHDAY_HTML.format_map({
+                'recipient': recipient.title(),
+                'current_user': self.current_user,
+                'sent_at': now_str
+            })
             
             # Send email
-            smtp_server = session_state.get('smtp_server')
-            smtp_port = session_state.get('smtp_port')
             sender_email = session_state.get('email_address')
-            sender_password = session_state.get('email_password')
-            
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(sender_email, sender_password)
-            
-            msg = MIMEMultipart('alternative')
-            msg['From'] = sender_email
-            msg['To'] = recipient_email
-            msg['Subject'] = subject
             
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
+            msg = _build_message(sender_email, recipient_email, subject, html_content)
             
-            server.send_message(msg)
-            server.quit()
+            refused = await asyncio.to_thread(self._deliver, session_state, msg, [recipient_email])
+            if refused:
+                raise smtplib.SMTPRecipientsRefused(refused)
             
             return {
                 "type": "text",
@@ -400,7 +473,7 @@ Try: "Schedule urgent team meeting for today"
 - **👤 Recipient:** {recipient.title()}
 - **📧 Email:** {recipient_email}
 - **📬 Subject:** {subject}
-- **🕐 Sent at:** {self.current_time.strftime('%Y-%m-%d %H:%M:%S')} UTC
+- **🕐 Sent at:** {now_str} UTC
 - **👤 From:** {self.current_user}
 
 **🎉 Message Delivered!** 
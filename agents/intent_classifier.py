@@ -1,16 +1,47 @@
+import re
 import google.generativeai as genai
 from datetime import datetime
 from typing import Dict, List
 
-class IntentClassificationAgent:
-    def __init__(self, gemini_model):
-        self.model = gemini_model
-        self.current_time = datetime(2025, 7, 21, 13, 56, 2)
-        
-    def classify_intent(self, user_input: str) -> Dict:
-        """Classify user intent using LLM"""
-        classification_prompt = f"""
-        Current Time: {self.current_time}
+from utils.cache import TTLCache
+from utils.logger import setup_logger
+from utils.serialization import from_json
+
+logger = setup_logger(__name__)
+
+# Fallback keyword patterns, compiled once - substring alternations matching the old any(...) checks
+EMAIL_RE = re.compile(r'mail|send|message|birthday|wishes|greeting|notify')
+RESTAURANT_RE = re.compile(r'restaurant|dinner|lunch|food|book|table|dining|eat')
+CALENDAR_RE = re.compile(r'meeting|schedule|appointment|calendar|availability')
+
+# High-signal keywords per intent, mirroring the prompt's category definitions; a request hitting
+# exactly one group is classified without the LLM, so communication verbs count as email signals
+MASTER_RE = re.compile(
+    r'\b(?:'
+    r'(?P<EMAIL_COMMUNICATION>e?mails?|emailing|messages?|wishes|greetings?|notify|notifications?'
+    r'|inform(?:ed)?|announce(?:ments?)?|updates?|send(?:ing)?|tell)'
+    r'|(?P<RESTAURANT_BOOKING>restaurants?|dinner|lunch|dining)'
+    r'|(?P<CALENDAR_SCHEDULING>meetings?|schedule|appointments?|calendar|availability)'
+    r'|(?P<EVENT_PLANNING>party|parties|celebration|organi[sz]e)'
+    r')\b'
+)
+
+# Fenced ```json (or bare ```) block around the model's JSON answer - the closing fence may be
+# missing because streaming stops as soon as the object's braces balance
+JSON_BLOCK_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*(?:```|$)', re.DOTALL)
+
+# Keyword matches at or above this confidence skip the LLM call
+FAST_PATH_THRESHOLD = 0.85
+
+# The answer is a tiny JSON object - ask for JSON directly and cap the output length
+_GENERATION_CONFIG = {"response_mime_type": "application/json", "max_output_tokens": 256}
+
+# LLM classifications keyed by (model name, normalized input); shared so re-created agents keep hits
+_CLASSIFICATION_CACHE = TTLCache(maxsize=1024, ttl=3600)
+
+# Static classification prompt - only the time and user input vary per call
+_PROMPT_TEMPLATE = """
+        Current Time: {time}
         User: A4xMimic
         
         Classify this user request into the most appropriate category:
@@ -41,71 +72,125 @@ class IntentClassificationAgent:
             "reasoning": "Brief explanation"
         }}
         """
+
+class IntentClassificationAgent:
+    __slots__ = ('model',)
+    
+    def __init__(self, gemini_model):
+        self.model = gemini_model
+        
+    @property
+    def current_time(self) -> datetime:
+        """Wall-clock time - evaluated on access instead of frozen at init"""
+        return datetime.now()
+    
+    def classify_intent(self, user_input: str) -> Dict:
+        """Classify user intent using LLM"""
+        # Read the clock once per request and reuse it for the prompt and results
+        now = self.current_time
+        timestamp = now.isoformat()
+        
+        # Lowercase once; the fast path, cache key and fallback all share it
+        user_lower = user_input.lower()
+        
+        # Unambiguous keyword matches don't need a network round-trip
+        fast_result = self._keyword_classification(user_lower, timestamp)
+        if fast_result["confidence"] >= FAST_PATH_THRESHOLD:
+            return fast_result
+        
+        # Repeated phrasings skip the network round-trip entirely
+        cache_key = (getattr(self.model, "model_name", None), user_lower.strip())
+        cached = _CLASSIFICATION_CACHE.get(cache_key)
+        if cached is not None:
+            return dict(cached, timestamp=timestamp)
+        
+        classification_prompt = _PROMPT_TEMPLATE.format(time=now, user_input=user_input)
         
         try:
-            response = self.model.generate_content(classification_prompt)
-            response_text = response.text.strip()
+            response = self.model.generate_content(
+                classification_prompt, stream=True, generation_config=_GENERATION_CONFIG
+            )
             
-            # Clean JSON from response
-            if '```json' in response_text:
-                json_start = response_text.find('```json') + 7
-                json_end = response_text.find('```', json_start)
-                response_text = response_text[json_start:json_end]
+            # Stop reading as soon as the JSON object is complete
+            response_text = ""
+            for chunk in response:
+                response_text += chunk.text
+                if '}' in response_text and response_text.count('{') == response_text.count('}'):
+                    break
+            response_text = response_text.strip()
             
-            import json
-            result = json.loads(response_text)
+            # Clean JSON from response - take the fenced object if present, else the raw text
+            match = JSON_BLOCK_RE.search(response_text)
+            result = from_json(match.group(1) if match else response_text)
             
-            return {
+            classification = {
                 "success": True,
                 "intent": result.get("intent", "GENERAL_TASK"),
                 "confidence": result.get("confidence", 0.5),
                 "entities": result.get("entities", []),
                 "reasoning": result.get("reasoning", ""),
-                "timestamp": self.current_time.isoformat()
+                "timestamp": timestamp
             }
             
+            # Only LLM answers are cached; keyword fallbacks are cheap and may be transient failures
+            _CLASSIFICATION_CACHE.set(cache_key, classification)
+            return dict(classification)
+            
         except Exception as e:
+            logger.warning(f"LLM intent classification failed, using keyword fallback: {str(e)}")
             # Fallback classification based on keywords
-            return self._fallback_classification(user_input)
+            return self._fallback_classification(user_lower, timestamp)
     
-    def _fallback_classification(self, user_input: str) -> Dict:
-        """Fallback classification using keyword matching"""
-        user_lower = user_input.lower()
+    def _keyword_classification(self, user_lower: str, timestamp: str) -> Dict:
+        """Fast-path classification - confident only when a single intent's keywords match"""
+        intents = {match.lastgroup for match in MASTER_RE.finditer(user_lower)}
         
+        if len(intents) != 1:
+            # No signal or conflicting signals - let the LLM decide
+            return {"success": False, "intent": None, "confidence": 0.0}
+        
+        return {
+            "success": True,
+            "intent": intents.pop(),
+            "confidence": 0.95,
+            "entities": [],
+            "reasoning": "Unambiguous keyword match",
+            "timestamp": timestamp
+        }
+    
+    def _fallback_classification(self, user_lower: str, timestamp: str) -> Dict:
+        """Fallback classification using keyword matching on pre-lowercased input"""
         # Email keywords
-        email_keywords = ['mail', 'email', 'send', 'message', 'birthday', 'wishes', 'greeting', 'notify']
-        if any(keyword in user_lower for keyword in email_keywords):
+        if EMAIL_RE.search(user_lower):
             return {
                 "success": True,
                 "intent": "EMAIL_COMMUNICATION",
                 "confidence": 0.8,
                 "entities": [],
                 "reasoning": "Keyword-based classification",
-                "timestamp": self.current_time.isoformat()
+                "timestamp": timestamp
             }
         
         # Restaurant keywords
-        restaurant_keywords = ['restaurant', 'dinner', 'lunch', 'food', 'book', 'table', 'dining', 'eat']
-        if any(keyword in user_lower for keyword in restaurant_keywords):
+        if RESTAURANT_RE.search(user_lower):
             return {
                 "success": True,
                 "intent": "RESTAURANT_BOOKING",
                 "confidence": 0.8,
                 "entities": [],
                 "reasoning": "Keyword-based classification",
-                "timestamp": self.current_time.isoformat()
+                "timestamp": timestamp
             }
         
         # Calendar keywords
-        calendar_keywords = ['meeting', 'schedule', 'appointment', 'calendar', 'availability', 'book meeting']
-        if any(keyword in user_lower for keyword in calendar_keywords):
+        if CALENDAR_RE.search(user_lower):
             return {
                 "success": True,
                 "intent": "CALENDAR_SCHEDULING", 
                 "confidence": 0.8,
                 "entities": [],
                 "reasoning": "Keyword-based classification",
-                "timestamp": self.current_time.isoformat()
+                "timestamp": timestamp
             }
         
         # Default to general task
@@ -115,5 +200,5 @@ class IntentClassificationAgent:
             "confidence": 0.6,
             "entities": [],
             "reasoning": "Default classification",
-            "timestamp": self.current_time.isoformat()
+            "timestamp": timestamp
         }
\ No newline at end of file
@@ -1,11 +1,245 @@
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import heapq
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 import logging
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Fallback classification keywords by bucket
+_FALLBACK_KEYWORDS = {
+    # 1. EMAIL COMMUNICATION - Explicit email requests
+    "email": frozenset([
+        'mail', 'email', 'send message', 'birthday wishes', 'wishes', 
+        'message to', 'email to', 'send to', 'notify', 'inform', 'tell'
+    ]),
+    # 2. RESTAURANT/EVENT PLANNING - Higher priority for party planning
+    "restaurant": frozenset([
+        # Event planning
+        'organize', 'birthday party', 'celebration', 'party', 'event',
+        'plan', 'celebrate',
+        # Restaurant/Food
+        'restaurant', 'dinner', 'lunch', 'food', 'eat', 'dining',
+        'great food', 'vibes', 'ambiance', 'place', 'venue',
+        # Locations  
+        'delhi', 'mumbai', 'hyderabad', 'bangalore', 'cannaught place',
+        'connaught place', 'cp', 'near office',
+        # Group context
+        'team', 'group', 'people', '6-person', 'colleagues',
+        # Action words
+        'go somewhere', 'book', 'reservation'
+    ]),
+    # 3. CALENDAR SCHEDULING - Only if no restaurant context
+    "calendar": frozenset(['meeting', 'schedule', 'availability', 'calendar', 'appointment'])
+}
+_FALLBACK_KEYWORD_BUCKET = {
+    keyword: bucket for bucket, keywords in _FALLBACK_KEYWORDS.items() for keyword in keywords
+}
+# A match reports the longest keyword at each position; this also credits keywords that are
+# prefixes of it (e.g. 'email to' -> 'email'), since they start at the same spot
+_FALLBACK_KEYWORD_PREFIXES = {
+    keyword: [other for other in _FALLBACK_KEYWORD_BUCKET if keyword.startswith(other)]
+    for keyword in _FALLBACK_KEYWORD_BUCKET
+}
+# Zero-width lookahead so overlapping keywords ('mail' inside 'email') are all found in one scan
+_FALLBACK_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(keyword) for keyword in
+                      sorted(_FALLBACK_KEYWORD_BUCKET, key=len, reverse=True)) + '))'
+)
+
+# High-precision phrases that settle the intent without an LLM round-trip; the email group only
+# exists to spot mixed requests ("email the team about dinner", "inform the team about the meeting"),
+# which still go to the classifier - it covers the email agent's own notification triggers
+_FAST_INTENT_RE = re.compile(
+    r'\b(?:'
+    r'(?P<RESTAURANT_BOOKING>restaurants?|dinner|lunch|birthday\s+party|book\s+(?:a|the)?\s*(?:table|restaurant))'
+    r'|(?P<CALENDAR_SCHEDULING>meetings?|schedule|availability)'
+    r'|(?P<EMAIL_COMMUNICATION>e?mails?|emailing|wishes|notify|notifications?|messages?|inform(?:ed)?'
+    r'|announce(?:ments?)?|updates?|send(?:ing)?|tell)'
+    r')\b',
+    re.IGNORECASE
+)
+
+# Cuisine keywords recognised in requests
+_CUISINES = (
+    # Indian cuisines
+    'indian', 'north indian', 'south indian', 'punjabi', 'gujarati', 'rajasthani',
+    'bengali', 'maharashtrian', 'tamil', 'kerala', 'hyderabadi', 'lucknowi', 'awadhi',
+    'mughlai', 'tandoor', 'biryani', 'dosa', 'thali',
+
+    # International cuisines
+    'chinese', 'italian', 'mexican', 'thai', 'japanese', 'korean', 'american',
+    'continental', 'mediterranean', 'french', 'greek', 'turkish', 'arabic',
+    'lebanese', 'persian', 'afghan', 'tibetan', 'burmese', 'vietnamese',
+
+    # Food types
+    'pizza', 'burger', 'pasta', 'seafood', 'sushi', 'bbq', 'barbecue',
+    'street food', 'fast food', 'fine dining', 'casual dining', 'buffet',
+
+    # Dietary preferences
+    'vegetarian', 'vegan', 'non-vegetarian', 'jain', 'halal', 'kosher',
+
+    # Specific dishes
+    'biryani', 'kebab', 'tikka', 'curry', 'dal', 'naan', 'roti', 'paratha'
+)
+# Match-priority order - longest first to list "north indian" before "indian"; duplicates dropped
+_CUISINES_BY_LENGTH = tuple(sorted(dict.fromkeys(_CUISINES), key=len, reverse=True))
+_CUISINE_PRIORITY = {cuisine: index for index, cuisine in enumerate(_CUISINES_BY_LENGTH)}
+# A match reports the longest cuisine at each position; this also credits cuisines that are
+# prefixes of it, since they start at the same spot
+_CUISINE_PREFIXES = {
+    cuisine: [other for other in _CUISINES_BY_LENGTH if cuisine.startswith(other)]
+    for cuisine in _CUISINES_BY_LENGTH
+}
+# Zero-width lookahead so overlapping cuisines are all found in one left-to-right scan
+_CUISINE_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(cuisine) for cuisine in _CUISINES_BY_LENGTH) + '))'
+)
+
+# Party-size hint keywords by group (substring match, so "teammates" counts as team)
+_PARTY_KEYWORDS = {
+    "team": ('team', 'group', 'colleagues', 'office', 'work'),
+    "family": ('family', 'relatives'),
+    "couple": ('couple', 'two', 'date', 'romantic'),
+    "large": ('large group', 'big group', 'celebration', 'party')
+}
+_PARTY_KEYWORD_GROUP = {keyword: group for group, keywords in _PARTY_KEYWORDS.items() for keyword in keywords}
+# No keyword is a prefix of another, so the lookahead reports every occurrence in one scan
+_PARTY_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(keyword) for keyword in _PARTY_KEYWORD_GROUP) + '))'
+)
+
+# Day names by weekday number (Monday == 0), matched anywhere in the text
+_WEEKDAY_INDEX = {
+    day: index for index, day in
+    enumerate(('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'))
+}
+_WEEKDAY_RE = re.compile('(' + '|'.join(_WEEKDAY_INDEX) + ')')
+# Days from today's weekday to the next target weekday: _WEEKDAY_OFFSETS[today][target].
+# Naming today's own weekday means the same day next week, so offsets run 1..7
+_WEEKDAY_OFFSETS = tuple(
+    tuple((target - today) % 7 or 7 for target in range(7)) for today in range(7)
+)
+
+# Relative date phrases in match-priority order, each mapping today's weekday to a day offset
+_RELATIVE_DATE_OFFSETS = {
+    'today': lambda weekday: 0,
+    'tomorrow': lambda weekday: 1,
+    'day after tomorrow': lambda weekday: 2,
+    'next week': lambda weekday: 7,
+    'this week': lambda weekday: 3,
+    'this weekend': lambda weekday: _WEEKDAY_OFFSETS[weekday][5],  # Coming Saturday
+    'next weekend': lambda weekday: _WEEKDAY_OFFSETS[weekday][5] % 7 + 7  # Saturday after this one
+}
+# 'this week' is a prefix of 'this weekend' - a match on the longer phrase credits both
+_RELATIVE_DATE_PREFIXES = {
+    phrase: [other for other in _RELATIVE_DATE_OFFSETS if phrase.startswith(other)]
+    for phrase in _RELATIVE_DATE_OFFSETS
+}
+_RELATIVE_DATE_RE = re.compile(
+    '(?=(' + '|'.join(sorted(_RELATIVE_DATE_OFFSETS, key=len, reverse=True)) + '))'
+)
+
+# Standalone numbers in the request, tried in order as a party size
+_NUMBER_RE = re.compile(r'\b(\d+)\b')
+
+# Numeric date formats as one alternation, one named group per format. The lookahead finds
+# overlapping candidates too, so a lower-priority match can't hide a higher-priority one
+_DATE_RE = re.compile(
+    r'(?=\b(?:'
+    r'(?P<ymd>(\d{4})-(\d{1,2})-(\d{1,2}))'  # YYYY-MM-DD
+    r'|(?P<slash>(\d{1,2})/(\d{1,2})/(\d{4}))'  # MM/DD/YYYY or DD/MM/YYYY
+    r'|(?P<dash>(\d{1,2})-(\d{1,2})-(\d{4}))'  # MM-DD-YYYY or DD-MM-YYYY
+    r'|(?P<dot>(\d{1,2})\.(\d{1,2})\.(\d{4}))'  # MM.DD.YYYY or DD.MM.YYYY
+    r')\b)'
+)
+_DATE_FORMAT_PRIORITY = {"ymd": 0, "slash": 1, "dash": 2, "dot": 3}
+
+# Bounded pool for blocking LLM calls - caps concurrent Gemini requests and keeps them off the event loop
+_LLM_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm")
+
+# Intents routed to the restaurant flow
+_RESTAURANT_INTENTS = frozenset(["RESTAURANT_BOOKING", "EVENT_PLANNING"])
+
+# Words that mark a restaurant request as event planning (substring match, so "organized" counts)
+_EVENT_CONTEXT_RE = re.compile(r'birthday|party|celebration|organize')
+
+# Indian cities and common locations, in match-priority order
+_CITIES = (
+    'mumbai', 'delhi', 'bangalore', 'bengaluru', 'hyderabad', 'chennai', 'kolkata', 'calcutta',
+    'pune', 'ahmedabad', 'jaipur', 'lucknow', 'kanpur', 'nagpur', 'indore', 'thane', 
+    'bhopal', 'visakhapatnam', 'pimpri', 'patna', 'vadodara', 'ghaziabad', 'ludhiana', 
+    'agra', 'nashik', 'faridabad', 'meerut', 'rajkot', 'kalyan', 'vasai', 'varanasi', 
+    'srinagar', 'aurangabad', 'dhanbad', 'amritsar', 'navi mumbai', 'allahabad', 'prayagraj',
+    'ranchi', 'howrah', 'coimbatore', 'jabalpur', 'gwalior', 'vijayawada', 'jodhpur',
+    'madurai', 'raipur', 'kota', 'guwahati', 'chandigarh', 'solapur', 'hubballi', 'tiruchirappalli',
+    'bareilly', 'mysuru', 'mysore', 'tiruppur', 'gurgaon', 'gurugram', 'aligarh', 'jalandhar',
+    'bhubaneswar', 'salem', 'warangal', 'guntur', 'bhiwandi', 'saharanpur', 'gorakhpur',
+    'bikaner', 'amravati', 'noida', 'jamshedpur', 'bhilai', 'cuttack', 'firozabad',
+    'kochi', 'cochin', 'nellore', 'bhavnagar', 'dehradun', 'durgapur', 'asansol'
+)
+# Alternate spellings collapse to one canonical name
+_CITY_ALIASES = {
+    'bengaluru': 'Bangalore', 'bangalore': 'Bangalore',
+    'calcutta': 'Kolkata', 'kolkata': 'Kolkata',
+    'cochin': 'Kochi', 'kochi': 'Kochi',
+    'mysuru': 'Mysore', 'mysore': 'Mysore',
+    'prayagraj': 'Allahabad', 'allahabad': 'Allahabad',
+    'gurugram': 'Gurgaon', 'gurgaon': 'Gurgaon'
+}
+_CITY_NAMES = {city: _CITY_ALIASES.get(city, city.title()) for city in _CITIES}
+_CITY_PRIORITY = {city: index for index, city in enumerate(_CITIES)}
+_CITY_PREFIXES = {city: [other for other in _CITIES if city.startswith(other)] for city in _CITIES}
+_CITY_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(city) for city in sorted(_CITIES, key=len, reverse=True)) + '))'
+)
+
+# Canned replies - static text built once, only the placeholders are filled per request
+_EMAIL_UNAVAILABLE_MESSAGE = """📧 **Email Request Detected!**
+                    
+I understand you want to send an email, but the email agent is not available.
+
+**For now, try:**
+- 🍽️ "Book birthday celebration restaurant for Mayank"
+- 🎉 "Organize birthday party with team dinner"
+
+Email features will be available soon!
+                    """
+
+_GENERAL_HELP_TEMPLATE = """🤖 **I understand you said:** "{user_input}"
+
+**I currently specialize in:**
+- 🍽️ **Restaurant Booking** - "Find restaurants in Delhi"
+- 🎉 **Event Planning** - "Organize birthday party for team"
+- 📅 **Calendar Integration** - "Check team availability" 
+- 📧 **Email Features** - "Mail birthday wishes"
+
+**Try asking me to:**
+- "Organize a birthday party for my team in Delhi tomorrow"
+- "Book a restaurant with great food and vibes near Connaught Place"
+- "Check team availability for next Tuesday"
+
+**Current Time:** {now} UTC
+**User:** A4xMimic
+            """
+
+def _month_day(first: int, second: int) -> Tuple[int, int]:
+    """Order the leading numbers of a numeric date - DD/MM if the first can't be a month, else MM/DD"""
+    return (second, first) if first > 12 else (first, second)
+
+def _option_rank(option: Dict) -> tuple:
+    """Ordering key for restaurant options - rating first, then share of the team available"""
+    time_slot = option["time_slot"]
+    return (
+        option["restaurant"].get("rating", 0),
+        time_slot["available_attendees"] / time_slot["total_attendees"]
+    )
+
 class AgentOrchestrator:
     def __init__(self, config):
         self.config = config
@@ -13,6 +247,8 @@ class AgentOrchestrator:
         self.calendar_agent = None
         self.intent_classifier = None  # NEW
         self.email_agent = None       # NEW
+        # Guards lazy sub-agent construction so concurrent requests build each agent once
+        self._init_lock = threading.Lock()
         
     def initialize_intent_classifier(self, gemini_model):
         """Initialize intent classifier with Gemini model"""
@@ -24,32 +260,33 @@ class AgentOrchestrator:
             logger.error(f"❌ Failed to initialize intent classifier: {str(e)}")
             self.intent_classifier = None
     
-    def initialize_email_agent(self):
-        """Initialize email agent"""
-        try:
-            from agents.email_agent import EmailCommunicationAgent
-            self.email_agent = EmailCommunicationAgent()
-            logger.info("✅ Email agent initialized successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize email agent: {str(e)}")
-            self.email_agent = None
-        
+    def _get_or_create_agent(self, attr: str, factory):
+        """Return the sub-agent stored on attr, constructing it once under the init lock"""
+        agent = getattr(self, attr)
+        if agent is None:
+            with self._init_lock:
+                agent = getattr(self, attr)
+                if agent is None:
+                    agent = factory()
+                    setattr(self, attr, agent)
+        return agent
+    
     async def process_goal(self, user_input: str, session_state: Dict) -> Dict:
         """ENHANCED: Process user goal with intent classification"""
         try:
             # STEP 1: CLASSIFY INTENT FIRST
-            intent_result = self._classify_user_intent(user_input)
+            intent_result = await self._classify_user_intent(user_input)
             intent = intent_result.get("intent", "RESTAURANT_BOOKING")
             confidence = intent_result.get("confidence", 0.5)
             
-            logger.info(f"🧠 Intent Classification: {intent} (confidence: {confidence})")
+            logger.info("🧠 Intent Classification: %s (confidence: %s)", intent, confidence)
             
             # STEP 2: ROUTE TO APPROPRIATE HANDLER
             if intent == "EMAIL_COMMUNICATION":
                 return await self._handle_email_request(user_input, session_state)
             elif intent == "CALENDAR_SCHEDULING":
                 return await self.handle_calendar_request(user_input, session_state)
-            elif intent in ["RESTAURANT_BOOKING", "EVENT_PLANNING"]:
+            elif intent in _RESTAURANT_INTENTS:
                 return await self.handle_restaurant_request(user_input, session_state)
             else:  # GENERAL_TASK
                 return await self._handle_general_request(user_input, session_state)
@@ -61,12 +298,26 @@ class AgentOrchestrator:
                 "content": f"I encountered an error processing your request: {str(e)}"
             }
     
-    def _classify_user_intent(self, user_input: str) -> Dict:
+    async def _classify_user_intent(self, user_input: str) -> Dict:
         """Classify user intent using LLM or fallback"""
+        # Obvious restaurant/calendar requests skip the classifier and its API latency
+        intents = {match.lastgroup for match in _FAST_INTENT_RE.finditer(user_input)}
+        if len(intents) == 1 and "EMAIL_COMMUNICATION" not in intents:
+            intent = intents.pop()
+            return {
+                "intent": intent,
+                "confidence": 0.95,
+                "reasoning": f"Fast-path keyword match ({intent})"
+            }
+        
         if self.intent_classifier:
             try:
-                result = self.intent_classifier.classify_intent(user_input)
-                logger.info(f"🤖 LLM Classification: {result.get('intent')} - {result.get('reasoning')}")
+                # The Gemini client is synchronous - run it off the event loop so other sessions keep moving
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    _LLM_EXECUTOR, self.intent_classifier.classify_intent, user_input
+                )
+                logger.info("🤖 LLM Classification: %s - %s", result.get('intent'), result.get('reasoning'))
                 return result
             except Exception as e:
                 logger.warning(f"LLM classification failed: {str(e)}, using fallback")
@@ -78,34 +329,15 @@ class AgentOrchestrator:
         """Enhanced fallback classification with better logic"""
         user_lower = user_input.lower()
         
-        # 1. EMAIL COMMUNICATION - Explicit email requests
-        email_keywords = [
-            'mail', 'email', 'send message', 'birthday wishes', 'wishes', 
-            'message to', 'email to', 'send to', 'notify', 'inform', 'tell'
-        ]
-        email_score = sum(1 for keyword in email_keywords if keyword in user_lower)
+        # Single regex pass finds every keyword occurrence, then scores each bucket
+        found = set()
+        for match in _FALLBACK_KEYWORD_RE.finditer(user_lower):
+            found.update(_FALLBACK_KEYWORD_PREFIXES[match.group(1)])
         
-        # 2. RESTAURANT/EVENT PLANNING - Higher priority for party planning
-        restaurant_event_keywords = [
-            # Event planning
-            'organize', 'birthday party', 'celebration', 'party', 'event',
-            'plan', 'celebrate',
-            # Restaurant/Food
-            'restaurant', 'dinner', 'lunch', 'food', 'eat', 'dining',
-            'great food', 'vibes', 'ambiance', 'place', 'venue',
-            # Locations  
-            'delhi', 'mumbai', 'hyderabad', 'bangalore', 'cannaught place',
-            'connaught place', 'cp', 'near office',
-            # Group context
-            'team', 'group', 'people', '6-person', 'colleagues',
-            # Action words
-            'go somewhere', 'book', 'reservation'
-        ]
-        restaurant_score = sum(1 for keyword in restaurant_event_keywords if keyword in user_lower)
-        
-        # 3. CALENDAR SCHEDULING - Only if no restaurant context
-        calendar_keywords = ['meeting', 'schedule', 'availability', 'calendar', 'appointment']
-        calendar_score = sum(1 for keyword in calendar_keywords if keyword in user_lower)
+        scores = Counter(_FALLBACK_KEYWORD_BUCKET[keyword] for keyword in found)
+        email_score = scores["email"]
+        restaurant_score = scores["restaurant"]
+        calendar_score = scores["calendar"]
         
         # DECISION LOGIC
         if email_score >= 1 and restaurant_score == 0:
@@ -137,26 +369,18 @@ class AgentOrchestrator:
         """Handle email communication requests"""
         try:
             # Initialize email agent if needed
-            if not self.email_agent:
-                self.initialize_email_agent()
-            
-            if self.email_agent:
-                logger.info("📧 Routing to email agent")
-                return await self.email_agent.process_email_request(user_input, session_state)
-            else:
+            try:
+                from agents.email_agent import EmailCommunicationAgent
+                email_agent = self._get_or_create_agent("email_agent", EmailCommunicationAgent)
+            except Exception as e:
+                logger.error(f"❌ Failed to initialize email agent: {str(e)}")
                 return {
                     "type": "text",
-                    "content": """📧 **Email Request Detected!**
-                    
-I understand you want to send an email, but the email agent is not available.
-
-**For now, try:**
-- 🍽️ "Book birthday celebration restaurant for Mayank"
-- 🎉 "Organize birthday party with team dinner"
-
-Email features will be available soon!
-                    """
+                    "content": _EMAIL_UNAVAILABLE_MESSAGE
                 }
+            
+            logger.info("📧 Routing to email agent")
+            return await email_agent.process_email_request(user_input, session_state)
                 
         except Exception as e:
             logger.error(f"Email request error: {str(e)}")
@@ -169,22 +393,10 @@ Email features will be available soon!
         """Handle general/unknown requests"""
         return {
             "type": "text",
-            "content": f"""🤖 **I understand you said:** "{user_input}"
-
-**I currently specialize in:**
-- 🍽️ **Restaurant Booking** - "Find restaurants in Delhi"
-- 🎉 **Event Planning** - "Organize birthday party for team"
-- 📅 **Calendar Integration** - "Check team availability" 
-- 📧 **Email Features** - "Mail birthday wishes"
-
-**Try asking me to:**
-- "Organize a birthday party for my team in Delhi tomorrow"
-- "Book a restaurant with great food and vibes near Connaught Place"
-- "Check team availability for next Tuesday"
-
-**Current Time:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} UTC
-**User:** A4xMimic
-            """
+            "content": _GENERAL_HELP_TEMPLATE.format(
+                user_input=user_input,
+                now=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            )
         }
 
     # Keep ALL your existing restaurant and calendar methods UNCHANGED
@@ -195,32 +407,39 @@ Email features will be available soon!
             from agents.restaurant_agent import RestaurantAgent
             from agents.calendar_agent import CalendarAgent
             
-            if not self.restaurant_agent:
-                self.restaurant_agent = RestaurantAgent(self.config)
-            if not self.calendar_agent:
-                self.calendar_agent = CalendarAgent(self.config)
+            self._get_or_create_agent("restaurant_agent", lambda: RestaurantAgent(self.config))
+            self._get_or_create_agent("calendar_agent", lambda: CalendarAgent(self.config))
+            
+            logger.info("🍽️ Processing restaurant request for: %s", user_input)
+            # Lowercase once; the extractors and the event-context check all share it
+            user_lower = user_input.lower()
             
-            logger.info(f"🍽️ Processing restaurant request for: {user_input}")
+            # Read the clock once; availability dates and the search timestamp share it
+            now = datetime.now()
             
             # Extract location from user input
-            location = self.extract_location(user_input)
+            location = self.extract_location(user_input, user_lower)
             if not location:
                 location = "Hyderabad"  # Default location
             
             # Extract cuisine preferences
-            cuisine_preferences = self.extract_cuisine(user_input)
+            cuisine_preferences = self.extract_cuisine(user_input, user_lower)
             
             # Extract party size
-            party_size = self.extract_party_size(user_input, session_state)
+            party_size = self.extract_party_size(user_input, session_state, user_lower)
             
-            logger.info(f"🔍 Search params - Location: {location}, Cuisine: {cuisine_preferences}, Party: {party_size}")
+            logger.info("🔍 Search params - Location: %s, Cuisine: %s, Party: %s", location, cuisine_preferences, party_size)
             
-            # Search for restaurants
-            restaurant_result = await self.restaurant_agent.search_restaurants(
-                location=location,
-                cuisine=cuisine_preferences,
-                party_size=party_size,
-                session_state=session_state
+            # Search for restaurants and get team availability for next few days - the two
+            # services are independent, so overlap them instead of waiting on each in turn
+            restaurant_result, availability_options = await asyncio.gather(
+                self.restaurant_agent.search_restaurants(
+                    location=location,
+                    cuisine=cuisine_preferences,
+                    party_size=party_size,
+                    session_state=session_state
+                ),
+                self._find_team_availability(range(1, 4), session_state, now.date())  # Next 3 days
             )
             
             if not restaurant_result.get("success"):
@@ -236,124 +455,45 @@ Email features will be available soon!
                     "content": f"No restaurants found in {location}. Try a different location or cuisine."
                 }
             
-            # Get team availability for next few days
-            availability_options = []
-            current_date = datetime.now().date()
-            
-            for i in range(1, 4):  # Next 3 days
-                check_date = current_date + timedelta(days=i)
-                date_str = check_date.strftime("%Y-%m-%d")
-                
-                # Check team availability
-                availability_result = await self.calendar_agent.find_availability(
-                    date=date_str,
-                    attendee_emails=session_state.get('team_emails', []),
-                    session_state=session_state
-                )
-                
-                if availability_result.get("success"):
-                    availability_options.append({
-                        "date": date_str,
-                        "availability": availability_result
-                    })
-            
-            # Combine restaurants with availability - FIXED TO AVOID DUPLICATES
-            options = []
-            seen_combinations = set()  # Track unique restaurant-date combinations
-            unique_restaurants = set()  # Track unique restaurants
-            
-            # Ensure we get diverse restaurant options first
-            for restaurant in restaurants[:8]:  # Look at top 8 restaurants
-                restaurant_key = restaurant['name'].lower().strip()
-                
-                # Skip if we've already included this restaurant
-                if restaurant_key in unique_restaurants:
-                    continue
-                
-                unique_restaurants.add(restaurant_key)
+            # Score each date (prefer higher availability and sooner dates). The score doesn't depend
+            # on the restaurant, so every restaurant's best date is the same - pick it once
+            date_slots = []
+            for avail_option in availability_options:
+                availability = avail_option["availability"]
+                time_slots = availability.get("time_slots", [])
+                if time_slots:
+                    best_slot = max(time_slots, key=lambda x: x["available_attendees"])
+                    availability_score = best_slot["available_attendees"] / best_slot["total_attendees"]
+                    date_score = 1.0 / (avail_option["days_ahead"] + 1)  # Prefer sooner dates
+                    date_slots.append((
+                        availability_score + date_score,
+                        avail_option, best_slot, availability.get('attendee_emails', [])
+                    ))
+            
+            # Best option per unique restaurant, keyed on the normalized name so duplicates collapse
+            best_by_restaurant = {}
+            if date_slots:
+                _, avail_option, best_slot, attendee_emails = max(date_slots, key=lambda x: x[0])
                 
-                # For each unique restaurant, find the best availability option
-                best_option = None
-                best_score = 0
-                
-                for avail_option in availability_options:
-                    availability = avail_option["availability"]
-                    
-                    # Create unique combination key
-                    combo_key = f"{restaurant_key}_{avail_option['date']}"
-                    
-                    if combo_key in seen_combinations:
-                        continue
-                    
-                    # Pick best time slot for this date
-                    time_slots = availability.get("time_slots", [])
-                    if time_slots:
-                        best_slot = max(time_slots, key=lambda x: x["available_attendees"])
-                        
-                        # Score this option (prefer higher availability and sooner dates)
-                        availability_score = best_slot["available_attendees"] / best_slot["total_attendees"]
-                        date_score = 1.0 / (i + 1)  # Prefer sooner dates
-                        total_score = availability_score + date_score
-                        
-                        if total_score > best_score:
-                            best_score = total_score
-                            best_option = {
-                                "title": f"{restaurant['name']} - {avail_option['date']} at {best_slot['time']}",
-                                "restaurant": restaurant,
-                                "time_slot": {
-                                    "date": avail_option['date'],
-                                    "time": best_slot['time'],
-                                    "available_attendees": best_slot['available_attendees'],
-                                    "total_attendees": best_slot['total_attendees'],
-                                    "attendee_emails": availability.get('attendee_emails', [])
-                                },
-                                "combo_key": combo_key
-                            }
-                
-                # Add the best option for this restaurant
-                if best_option:
-                    seen_combinations.add(best_option["combo_key"])
-                    options.append(best_option)
-                    
-                    # Stop if we have enough options
-                    if len(options) >= 6:
-                        break
-            
-            # If we don't have enough options, add more combinations from remaining restaurants
-            if len(options) < 6:
                 for restaurant in restaurants:
                     restaurant_key = restaurant['name'].lower().strip()
+                    if restaurant_key in best_by_restaurant:
+                        continue
                     
-                    for avail_option in availability_options:
-                        availability = avail_option["availability"]
-                        combo_key = f"{restaurant_key}_{avail_option['date']}"
-                        
-                        if combo_key in seen_combinations:
-                            continue
-                        
-                        time_slots = availability.get("time_slots", [])
-                        if time_slots:
-                            best_slot = max(time_slots, key=lambda x: x["available_attendees"])
-                            
-                            options.append({
-                                "title": f"{restaurant['name']} - {avail_option['date']} at {best_slot['time']}",
-                                "restaurant": restaurant,
-                                "time_slot": {
-                                    "date": avail_option['date'],
-                                    "time": best_slot['time'],
-                                    "available_attendees": best_slot['available_attendees'],
-                                    "total_attendees": best_slot['total_attendees'],
-                                    "attendee_emails": availability.get('attendee_emails', [])
-                                }
-                            })
-                            
-                            seen_combinations.add(combo_key)
-                            
-                            if len(options) >= 6:
-                                break
-                    
-                    if len(options) >= 6:
-                        break
+                    best_by_restaurant[restaurant_key] = {
+                        "title": f"{restaurant['name']} - {avail_option['date']} at {best_slot['time']}",
+                        "restaurant": restaurant,
+                        "time_slot": {
+                            "date": avail_option['date'],
+                            "time": best_slot['time'],
+                            "available_attendees": best_slot['available_attendees'],
+                            "total_attendees": best_slot['total_attendees'],
+                            "attendee_emails": attendee_emails
+                        }
+                    }
+            
+            # Keep the top options by restaurant rating and availability - a bounded heap, not a full sort
+            options = heapq.nlargest(6, best_by_restaurant.values(), key=_option_rank)
             
             if not options:
                 return {
@@ -361,27 +501,21 @@ Email features will be available soon!
                     "content": "No suitable restaurant and time combinations found. Please try adjusting your preferences."
                 }
             
-            # Sort options by restaurant rating and availability
-            options.sort(key=lambda x: (
-                x["restaurant"].get("rating", 0),
-                x["time_slot"]["available_attendees"] / x["time_slot"]["total_attendees"]
-            ), reverse=True)
-            
             # Add event context if this was an event planning request
             note_suffix = ""
-            if any(word in user_input.lower() for word in ['birthday', 'party', 'celebration', 'organize']):
+            if _EVENT_CONTEXT_RE.search(user_lower):
                 note_suffix = " - Perfect venues for your celebration! 🎉"
             
             return {
                 "type": "options",
                 "content": {
-                    "options": options[:6],  # Final limit to 6 unique options
-                    "note": f"Found {len(unique_restaurants)} unique restaurants in {location} with team availability{note_suffix}",
+                    "options": options,  # Already limited to 6 unique options
+                    "note": f"Found {len(best_by_restaurant)} unique restaurants in {location} with team availability{note_suffix}",
                     "search_criteria": {
                         "location": location,
                         "cuisine": cuisine_preferences,
                         "party_size": party_size,
-                        "search_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        "search_date": now.strftime("%Y-%m-%d %H:%M:%S"),
                         "user": "A4xMimic",
                         "intent": "restaurant_booking",
                         "event_context": bool(note_suffix)
@@ -396,13 +530,53 @@ Email features will be available soon!
                 "content": f"Error processing restaurant request: {str(e)}"
             }
     
+    async def _find_team_availability(self, days_ahead: range, session_state: Dict,
+                                      current_date: Optional[date] = None) -> List[Dict]:
+        """Check team availability for several upcoming days concurrently, keeping date order"""
+        if current_date is None:
+            current_date = datetime.now().date()
+        dates = [(current_date + timedelta(days=i)).isoformat() for i in days_ahead]
+        
+        # Probes are independent calendar RPCs - overlap them, capped to respect API rate limits
+        max_concurrency = self.config.get("api.calendar.max_concurrency", 3) if self.config else 3
+        semaphore = asyncio.Semaphore(max_concurrency)
+        attendee_emails = session_state.get('team_emails', [])
+        
+        async def probe(date_str: str) -> Dict:
+            async with semaphore:
+                return await self.calendar_agent.find_availability(
+                    date=date_str,
+                    attendee_emails=attendee_emails,
+                    session_state=session_state
+                )
+        
+        results = await asyncio.gather(*(probe(date_str) for date_str in dates), return_exceptions=True)
+        
+        availability_options = []
+        for offset, date_str, availability_result in zip(days_ahead, dates, results):
+            if isinstance(availability_result, Exception):
+                logger.warning(f"Availability check failed for {date_str}: {str(availability_result)}")
+                continue
+            
+            if availability_result.get("success"):
+                availability_options.append({
+                    "date": date_str,
+                    "availability": availability_result,
+                    "days_ahead": offset
+                })
+        
+        return availability_options
+    
     async def handle_calendar_request(self, user_input: str, session_state: Dict) -> Dict:
         """Handle calendar and meeting requests"""
         try:
+            from agents.calendar_agent import CalendarAgent
+            self._get_or_create_agent("calendar_agent", lambda: CalendarAgent(self.config))
+            
             # Extract date from user input
             target_date = self.extract_date(user_input)
             if not target_date:
-                target_date = (datetime.now().date() + timedelta(days=1)).strftime("%Y-%m-%d")
+                target_date = (datetime.now().date() + timedelta(days=1)).isoformat()
             
             # Check team availability
             availability_result = await self.calendar_agent.find_availability(
@@ -441,14 +615,37 @@ Email features will be available soon!
             restaurant = selected_option.get("restaurant", {})
             time_slot = selected_option.get("time_slot", {})
             
+            # Read the clock once so the confirmation ID and every timestamp in the payload agree
+            now = datetime.now()
+            now_str = now.strftime("%Y-%m-%d %H:%M:%S")
+            
             # Generate confirmation ID with timestamp
-            confirmation_id = f"BOOK_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            confirmation_id = f"BOOK_{now.strftime('%Y%m%d%H%M%S')}"
             
-            # Process restaurant reservation
-            reservation_result = await self.process_restaurant_reservation(restaurant, time_slot, confirmation_id)
+            # Process restaurant reservation and create calendar event - independent, so run together
+            reservation_result, calendar_result = await asyncio.gather(
+                self.process_restaurant_reservation(restaurant, time_slot, confirmation_id),
+                self.create_calendar_event(restaurant, time_slot, confirmation_id, session_state, now_str),
+                return_exceptions=True
+            )
             
-            # Create calendar event
-            calendar_result = await self.create_calendar_event(restaurant, time_slot, confirmation_id, session_state)
+            # A failure in one branch shouldn't discard the other's result
+            if isinstance(reservation_result, Exception):
+                logger.error(f"Reservation processing error: {str(reservation_result)}")
+                reservation_result = {
+                    "confirmation": confirmation_id,
+                    "method": "manual",
+                    "status": "error",
+                    "error": str(reservation_result)
+                }
+            if isinstance(calendar_result, Exception):
+                logger.error(f"Calendar event creation error: {str(calendar_result)}")
+                calendar_result = {
+                    "source": "error_fallback",
+                    "event_id": f"error_{confirmation_id}",
+                    "status": "error",
+                    "error": str(calendar_result)
+                }
             
             return {
                 "success": True,
@@ -457,7 +654,7 @@ Email features will be available soon!
                           f"📞 Please call {restaurant.get('phone', 'the restaurant')} to confirm reservation.",
                 "reservation": reservation_result,
                 "calendar_event": calendar_result,
-                "booking_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "booking_time": now_str,
                 "user": "A4xMimic"
             }
             
@@ -495,9 +692,13 @@ Email features will be available soon!
                 "error": str(e)
             }
     
-    async def create_calendar_event(self, restaurant: Dict, time_slot: Dict, confirmation_id: str, session_state: Dict) -> Dict:
+    async def create_calendar_event(self, restaurant: Dict, time_slot: Dict, confirmation_id: str, session_state: Dict,
+                                    now_str: Optional[str] = None) -> Dict:
         """Create calendar event for the booking"""
         try:
+            if now_str is None:
+                now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
             # Prepare event details
             event_title = f"Team Dinner at {restaurant.get('name', 'Restaurant')}"
             event_description = f"""Team Dinner Booking - {confirmation_id}
@@ -510,7 +711,7 @@ Email features will be available soon!
 
 🎯 Reservation: {confirmation_id}
 👤 Organized by: A4xMimic
-📅 Booking Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+📅 Booking Date: {now_str}
 
 Please confirm attendance and bring ID for reservation.
 
@@ -546,7 +747,7 @@ Team Members Invited:
                     "status": calendar_event.get("status"),
                     "attendees": attendee_emails,
                     "event_title": event_title,
-                    "creation_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    "creation_time": now_str
                 }
             else:
                 # Create fallback universal link
@@ -571,191 +772,103 @@ Team Members Invited:
                 "attendees": time_slot.get('attendee_emails', [])
             }
     
-    def extract_location(self, text: str) -> Optional[str]:
+    def extract_location(self, text: str, text_lower: Optional[str] = None) -> Optional[str]:
         """Extract location from user input"""
-        # Indian cities and common locations
-        locations = [
-            'mumbai', 'delhi', 'bangalore', 'bengaluru', 'hyderabad', 'chennai', 'kolkata', 'calcutta',
-            'pune', 'ahmedabad', 'jaipur', 'lucknow', 'kanpur', 'nagpur', 'indore', 'thane', 
-            'bhopal', 'visakhapatnam', 'pimpri', 'patna', 'vadodara', 'ghaziabad', 'ludhiana', 
-            'agra', 'nashik', 'faridabad', 'meerut', 'rajkot', 'kalyan', 'vasai', 'varanasi', 
-            'srinagar', 'aurangabad', 'dhanbad', 'amritsar', 'navi mumbai', 'allahabad', 'prayagraj',
-            'ranchi', 'howrah', 'coimbatore', 'jabalpur', 'gwalior', 'vijayawada', 'jodhpur',
-            'madurai', 'raipur', 'kota', 'guwahati', 'chandigarh', 'solapur', 'hubballi', 'tiruchirappalli',
-            'bareilly', 'mysuru', 'mysore', 'tiruppur', 'gurgaon', 'gurugram', 'aligarh', 'jalandhar',
-            'bhubaneswar', 'salem', 'warangal', 'guntur', 'bhiwandi', 'saharanpur', 'gorakhpur',
-            'bikaner', 'amravati', 'noida', 'jamshedpur', 'bhilai', 'cuttack', 'firozabad',
-            'kochi', 'cochin', 'nellore', 'bhavnagar', 'dehradun', 'durgapur', 'asansol'
-        ]
-        
-        text_lower = text.lower()
+        if text_lower is None:
+            text_lower = text.lower()
         
-        # Direct location matches
-        for location in locations:
-            if location in text_lower:
-                # Handle special cases
-                if location in ['bengaluru', 'bangalore']:
-                    return 'Bangalore'
-                elif location in ['calcutta', 'kolkata']:
-                    return 'Kolkata'
-                elif location in ['cochin', 'kochi']:
-                    return 'Kochi'
-                elif location in ['mysuru', 'mysore']:
-                    return 'Mysore'
-                elif location in ['prayagraj', 'allahabad']:
-                    return 'Allahabad'
-                elif location in ['gurugram', 'gurgaon']:
-                    return 'Gurgaon'
-                else:
-                    return location.title()
+        # One scan finds every city mention; the earliest entry in _CITIES wins, as before
+        found = set()
+        for match in _CITY_RE.finditer(text_lower):
+            found.update(_CITY_PREFIXES[match.group(1)])
         
-        # Check for phrases like "in Mumbai", "near Delhi", etc.
-        import re
-        location_pattern = r'\b(?:in|near|at|around)\s+([a-zA-Z\s]+?)(?:\s|$|,|\.)'
-        matches = re.findall(location_pattern, text_lower)
+        if not found:
+            return None
         
-        for match in matches:
-            match = match.strip()
-            for location in locations:
-                if location in match:
-                    return location.title()
-        
-        return None
+        return _CITY_NAMES[min(found, key=_CITY_PRIORITY.__getitem__)]
     
-    def extract_cuisine(self, text: str) -> List[str]:
+    def extract_cuisine(self, text: str, text_lower: Optional[str] = None) -> List[str]:
         """Extract cuisine preferences from user input"""
-        cuisines = [
-            # Indian cuisines
-            'indian', 'north indian', 'south indian', 'punjabi', 'gujarati', 'rajasthani', 
-            'bengali', 'maharashtrian', 'tamil', 'kerala', 'hyderabadi', 'lucknowi', 'awadhi',
-            'mughlai', 'tandoor', 'biryani', 'dosa', 'thali',
-            
-            # International cuisines  
-            'chinese', 'italian', 'mexican', 'thai', 'japanese', 'korean', 'american',
-            'continental', 'mediterranean', 'french', 'greek', 'turkish', 'arabic',
-            'lebanese', 'persian', 'afghan', 'tibetan', 'burmese', 'vietnamese',
-            
-            # Food types
-            'pizza', 'burger', 'pasta', 'seafood', 'sushi', 'bbq', 'barbecue',
-            'street food', 'fast food', 'fine dining', 'casual dining', 'buffet',
-            
-            # Dietary preferences
-            'vegetarian', 'vegan', 'non-vegetarian', 'jain', 'halal', 'kosher',
-            
-            # Specific dishes
-            'biryani', 'kebab', 'tikka', 'curry', 'dal', 'naan', 'roti', 'paratha'
-        ]
-        
-        text_lower = text.lower()
-        found_cuisines = []
-        
-        # Sort cuisines by length (longest first) to match "north indian" before "indian"
-        cuisines_sorted = sorted(cuisines, key=len, reverse=True)
+        if text_lower is None:
+            text_lower = text.lower()
         
-        for cuisine in cuisines_sorted:
-            if cuisine in text_lower and cuisine not in found_cuisines:
-                found_cuisines.append(cuisine)
+        # One scan finds every cuisine mention, including ones nested in longer matches
+        found = set()
+        for match in _CUISINE_RE.finditer(text_lower):
+            found.update(_CUISINE_PREFIXES[match.group(1)])
         
-        return found_cuisines if found_cuisines else ['indian']
+        # Longest first, so "north indian" is listed before "indian"
+        return sorted(found, key=_CUISINE_PRIORITY.__getitem__) if found else ['indian']
     
-    def extract_party_size(self, text: str, session_state: Dict) -> int:
+    def extract_party_size(self, text: str, session_state: Dict, text_lower: Optional[str] = None) -> int:
         """Extract party size from user input"""
-        import re
+        if text_lower is None:
+            text_lower = text.lower()
         
-        # Look for explicit numbers
-        numbers = re.findall(r'\b(\d+)\b', text)
-        
-        # Look for specific patterns
-        text_lower = text.lower()
+        # Look for specific patterns - one scan collects every keyword group mentioned
+        groups = {_PARTY_KEYWORD_GROUP[match.group(1)] for match in _PARTY_KEYWORD_RE.finditer(text_lower)}
         
         # Team-related keywords
-        if any(word in text_lower for word in ['team', 'group', 'colleagues', 'office', 'work']):
+        if "team" in groups:
             return session_state.get('team_size', 6)
         
         # Family-related keywords
-        if any(word in text_lower for word in ['family', 'relatives']):
+        if "family" in groups:
             return 4
         
         # Couple-related keywords
-        if any(word in text_lower for word in ['couple', 'two', 'date', 'romantic']):
+        if "couple" in groups:
             return 2
         
         # Large group keywords
-        if any(word in text_lower for word in ['large group', 'big group', 'celebration', 'party']):
+        if "large" in groups:
             return max(session_state.get('team_size', 6), 8)
         
-        # Use first reasonable number found
-        for num_str in numbers:
-            num = int(num_str)
+        # Use first reasonable number found - scanned lazily, stopping at the first hit
+        for match in _NUMBER_RE.finditer(text):
+            num = int(match.group(1))
             if 1 <= num <= 50:  # Reasonable party size range
                 return num
         
         # Default to team size
         return session_state.get('team_size', 6)
     
-    def extract_date(self, text: str) -> Optional[str]:
+    def extract_date(self, text: str, text_lower: Optional[str] = None) -> Optional[str]:
         """Extract date from user input"""
-        import re
-        from datetime import datetime, timedelta
-        
-        text_lower = text.lower()
+        if text_lower is None:
+            text_lower = text.lower()
         current_date = datetime.now().date()
         
-        # Handle relative dates
-        if 'today' in text_lower:
-            return current_date.strftime("%Y-%m-%d")
-        elif 'tomorrow' in text_lower:
-            return (current_date + timedelta(days=1)).strftime("%Y-%m-%d")
-        elif 'day after tomorrow' in text_lower:
-            return (current_date + timedelta(days=2)).strftime("%Y-%m-%d")
-        elif 'next week' in text_lower:
-            return (current_date + timedelta(days=7)).strftime("%Y-%m-%d")
-        elif 'this week' in text_lower:
-            return (current_date + timedelta(days=3)).strftime("%Y-%m-%d")
-        elif 'this weekend' in text_lower:
-            days_until_saturday = (5 - current_date.weekday()) % 7
-            if days_until_saturday == 0:  # It's Saturday
-                days_until_saturday = 7
-            return (current_date + timedelta(days=days_until_saturday)).strftime("%Y-%m-%d")
-        elif 'next weekend' in text_lower:
-            days_until_next_saturday = ((5 - current_date.weekday()) % 7) + 7
-            return (current_date + timedelta(days=days_until_next_saturday)).strftime("%Y-%m-%d")
+        # Handle relative dates - one scan, then the first phrase in _RELATIVE_DATE_OFFSETS order wins
+        found = set()
+        for match in _RELATIVE_DATE_RE.finditer(text_lower):
+            found.update(_RELATIVE_DATE_PREFIXES[match.group(1)])
         
-        # Handle day names
-        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        for i, day in enumerate(days):
-            if day in text_lower:
-                days_ahead = (i - current_date.weekday()) % 7
-                if days_ahead == 0:  # Today is that day, get next week
-                    days_ahead = 7
-                return (current_date + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
+        for phrase, days_ahead in _RELATIVE_DATE_OFFSETS.items():
+            if phrase in found:
+                return (current_date + timedelta(days=days_ahead(current_date.weekday()))).isoformat()
         
-        # Look for date patterns (YYYY-MM-DD, MM/DD/YYYY, DD/MM/YYYY, etc.)
-        date_patterns = [
-            r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b',  # YYYY-MM-DD
-            r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b',  # MM/DD/YYYY or DD/MM/YYYY
-            r'\b(\d{1,2})-(\d{1,2})-(\d{4})\b',  # MM-DD-YYYY or DD-MM-YYYY
-            r'\b(\d{1,2})\.(\d{1,2})\.(\d{4})\b'  # MM.DD.YYYY or DD.MM.YYYY
-        ]
+        # Handle day names - as before, the first in Monday..Sunday order wins, not the first in the text
+        weekdays = [_WEEKDAY_INDEX[match.group(1)] for match in _WEEKDAY_RE.finditer(text_lower)]
+        if weekdays:
+            days_ahead = _WEEKDAY_OFFSETS[current_date.weekday()][min(weekdays)]
+            return (current_date + timedelta(days=days_ahead)).isoformat()
         
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                try:
-                    match = matches[0]
-                    if pattern.startswith(r'\b(\d{4})'):  # YYYY-MM-DD format
-                        year, month, day = match
-                        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                    else:  # Other formats - assume MM/DD/YYYY (US format)
-                        part1, part2, year = match
-                        # Simple heuristic: if first part > 12, assume DD/MM format
-                        if int(part1) > 12:
-                            day, month = part1, part2
-                        else:
-                            month, day = part1, part2
-                        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                except (ValueError, IndexError):
-                    continue
+        # Look for date patterns (YYYY-MM-DD, MM/DD/YYYY, DD/MM/YYYY, etc.)
+        # One scan finds every numeric date; the highest-priority format wins, first occurrence first
+        best = None
+        for match in _DATE_RE.finditer(text):
+            if best is None or _DATE_FORMAT_PRIORITY[match.lastgroup] < _DATE_FORMAT_PRIORITY[best.lastgroup]:
+                best = match
+        
+        if best:
+            start = _DATE_RE.groupindex[best.lastgroup]
+            first, second, third = best.group(start + 1, start + 2, start + 3)
+            if best.lastgroup == "ymd":  # YYYY-MM-DD format
+                return f"{first}-{int(second):02d}-{int(third):02d}"
+            # Other formats - assume MM/DD/YYYY (US format)
+            month, day = _month_day(int(first), int(second))
+            return f"{third}-{month:02d}-{day:02d}"
         
         return None
     
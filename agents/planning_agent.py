@@ -1,12 +1,118 @@
-from typing import Dict, List, Any
+import asyncio
+import copy
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple
 import re
-from datetime import datetime, timedelta
-import google.generativeai as genai
+from string import Template
+from datetime import date, datetime
+from functools import lru_cache
 
 from utils.logger import setup_logger
+from utils.cache import TTLCache
 
 logger = setup_logger(__name__)
 
+# Requirement patterns, compiled once and tried in order
+_LOCATION_PATTERNS = (
+    re.compile(r"location[:\s]+([^\n]+)", re.IGNORECASE),
+    re.compile(r"in\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", re.IGNORECASE),
+    re.compile(r"at\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", re.IGNORECASE)
+)
+_SIZE_PATTERNS = (
+    re.compile(r"(\d+)\s*people", re.IGNORECASE),
+    re.compile(r"(\d+)\s*person", re.IGNORECASE),
+    re.compile(r"team\s+of\s+(\d+)", re.IGNORECASE),
+    re.compile(r"(\d+)\s*members", re.IGNORECASE)
+)
+
+# Available models and the chosen model name per API key (SHA-256), shared by all planning agents
+_MODEL_RESOLUTION_CACHE = TTLCache(maxsize=8, ttl=6 * 3600)
+
+# Parsed plans keyed by (model, normalized goal, user context, day); shared across agent instances
+_PLAN_CACHE = TTLCache(maxsize=128, ttl=3600)
+
+# Cuisines picked out of the analysis, paired with their display form
+_CUISINE_TITLES = tuple(
+    (cuisine, cuisine.title())
+    for cuisine in ("indian", "chinese", "italian", "mexican", "thai", "mediterranean", "biryani")
+)
+
+# Static planning prompt - only the goal and user context are filled per call
+_PLANNING_PROMPT_TEMPLATE = Template("""
+You are an expert planning assistant. Analyze the following user goal and create a structured execution plan.
+
+USER GOAL: $user_goal
+
+USER CONTEXT:
+- Default Location: $default_location
+- Default Team Size: $team_size
+- Preferred Cuisines: $preferred_cuisine
+- Current Date: $current_date
+- Current Time: $current_time
+
+Please analyze this goal and provide:
+
+1. TASK TYPE: Classify this as one of:
+   - restaurant_booking
+   - event_planning
+   - meeting_scheduling
+   - travel_planning
+   - general_assistance
+
+2. KEY REQUIREMENTS: Extract specific requirements like:
+   - Location/venue preferences
+   - Date/time constraints
+   - Number of people involved
+   - Budget considerations
+   - Special preferences or constraints
+
+3. EXECUTION STEPS: Break down into logical steps:
+   - What research is needed?
+   - What external services to query?
+   - What user inputs are required?
+   - What final actions need to be taken?
+
+4. POTENTIAL CHALLENGES: Identify possible issues:
+   - Availability conflicts
+   - Limited options
+   - Booking difficulties
+   - Communication needs
+
+5. SUCCESS CRITERIA: Define what constitutes success:
+   - What deliverables are expected?
+   - How will we measure completion?
+
+Format your response as a structured analysis that I can parse programmatically.
+Be specific about dates, times, locations, and requirements.
+""")
+
+# Task types in priority order, matched either as written or with spaces for underscores
+_TASK_TYPES = ("restaurant_booking", "event_planning", "meeting_scheduling", "travel_planning", "general_assistance")
+_TASK_TYPE_NAMES = {
+    name: task_type for task_type in _TASK_TYPES for name in (task_type, task_type.replace("_", " "))
+}
+_TASK_TYPE_RE = re.compile("|".join(_TASK_TYPE_NAMES))
+
+# Keyword fallback per task type, in priority order (substring match, so "events" counts)
+_TASK_KEYWORDS = (
+    ("restaurant_booking", frozenset(["restaurant", "dinner", "lunch", "eat", "food"])),
+    ("meeting_scheduling", frozenset(["meeting", "call", "discussion", "sync"])),
+    ("event_planning", frozenset(["event", "party", "celebration", "gathering"])),
+    ("travel_planning", frozenset(["travel", "trip", "flight", "hotel"]))
+)
+_TASK_KEYWORD_TYPE = {keyword: task_type for task_type, keywords in _TASK_KEYWORDS for keyword in keywords}
+# No keyword is a prefix of another, so the lookahead reports every occurrence in one scan
+_TASK_KEYWORD_RE = re.compile("(?=(" + "|".join(_TASK_KEYWORD_TYPE) + "))")
+
+# Day names in week order, matched anywhere in the analysis
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_WEEKDAY_RE = re.compile("(" + "|".join(_WEEKDAYS) + ")")
+
+@lru_cache(maxsize=8)
+def _iso_dates(start_ordinal: int, count: int) -> Tuple[str, ...]:
+    """ISO strings for `count` consecutive days from a date ordinal - keyed on the day, so it rolls over at midnight"""
+    return tuple(date.fromordinal(start_ordinal + offset).isoformat() for offset in range(count))
+
 class PlanningAgent:
     """Agent responsible for breaking down high-level goals into actionable plans"""
     
@@ -14,15 +120,28 @@ class PlanningAgent:
         self.config = config
         self.model = None
         self.available_models = []
+        self._genai = None
         
     def initialize_model(self, api_key: str):
         """Initialize the Gemini model with current available models"""
         if not self.model:
             try:
-                genai.configure(api_key=api_key)
+                # Imported on first use so the client library (grpc, protobuf) isn't loaded with the module
+                import google.generativeai as genai
+                self._genai = genai
+                self._genai.configure(api_key=api_key)
+                
+                # Another agent already resolved a model for this key - skip the list_models round-trip
+                key_hash = hashlib.sha256(api_key.encode()).digest()
+                resolved = _MODEL_RESOLUTION_CACHE.get(key_hash)
+                if resolved is not None:
+                    available_models, model_name = resolved
+                    self.available_models = list(available_models)
+                    self.model = self._genai.GenerativeModel(model_name)
+                    return True
                 
                 # Get available models
-                self.available_models = [m.name for m in genai.list_models() 
+                self.available_models = [m.name for m in self._genai.list_models() 
                                        if 'generateContent' in m.supported_generation_methods]
                 
                 # Updated model preferences (as of July 2024+)
@@ -40,8 +159,9 @@ class PlanningAgent:
                 for model_name in model_preferences:
                     if model_name in self.available_models:
                         try:
-                            self.model = genai.GenerativeModel(model_name)
+                            self.model = self._genai.GenerativeModel(model_name)
                             logger.info(f"Successfully initialized model: {model_name}")
+                            _MODEL_RESOLUTION_CACHE.set(key_hash, (tuple(self.available_models), model_name))
                             return True
                         except Exception as e:
                             logger.warning(f"Failed to initialize {model_name}: {str(e)}")
@@ -51,8 +171,9 @@ class PlanningAgent:
                 if self.available_models:
                     first_model = self.available_models[0]
                     try:
-                        self.model = genai.GenerativeModel(first_model)
+                        self.model = self._genai.GenerativeModel(first_model)
                         logger.info(f"Using fallback model: {first_model}")
+                        _MODEL_RESOLUTION_CACHE.set(key_hash, (tuple(self.available_models), first_model))
                         return True
                     except Exception as e:
                         logger.error(f"Failed to initialize fallback model {first_model}: {str(e)}")
@@ -83,14 +204,38 @@ class PlanningAgent:
             if not self.model:
                 return {"success": False, "message": "Gemini API key not configured"}
             
+            # Repeated goals with the same context on the same day reuse the earlier analysis
+            now = datetime.now()
+            cache_key = (
+                getattr(self.model, "model_name", None),
+                " ".join(user_goal.lower().split()),
+                str(session_state.get('default_location')),
+                str(session_state.get('team_size')),
+                str(session_state.get('preferred_cuisine')),
+                now.date().toordinal()
+            )
+            cached = _PLAN_CACHE.get(cache_key)
+            if cached is not None:
+                structured_plan, plan_analysis = cached
+                # Hand out a copy so callers can update step status without touching the cache
+                structured_plan = copy.deepcopy(structured_plan)
+                structured_plan["created_at"] = now.isoformat()
+                return {
+                    "success": True,
+                    "plan": structured_plan,
+                    "analysis": plan_analysis
+                }
+            
             # Analyze the goal and create a structured plan
             plan_prompt = self.create_planning_prompt(user_goal, session_state)
             
-            response = self.model.generate_content(plan_prompt)
+            # The Gemini client is synchronous - run it off the event loop
+            response = await asyncio.to_thread(self.model.generate_content, plan_prompt)
             plan_analysis = response.text
             
             # Parse the plan analysis into structured data
             structured_plan = self.parse_plan_analysis(plan_analysis, user_goal, session_state)
+            _PLAN_CACHE.set(cache_key, (copy.deepcopy(structured_plan), plan_analysis))
             
             return {
                 "success": True,
@@ -105,71 +250,29 @@ class PlanningAgent:
     def create_planning_prompt(self, user_goal: str, session_state: Dict) -> str:
         """Create a detailed prompt for plan generation"""
         
+        # One clock read for both the date and time fields, so they can't straddle midnight
+        now = datetime.now()
         user_context = {
             "default_location": session_state.get('default_location', 'Not specified'),
             "team_size": session_state.get('team_size', 'Not specified'),
             "preferred_cuisine": session_state.get('preferred_cuisine', 'Not specified'),
-            "current_date": datetime.now().strftime("%Y-%m-%d"),
-            "current_time": datetime.now().strftime("%H:%M")
+            "current_date": now.date().isoformat(),
+            "current_time": now.strftime("%H:%M")
         }
         
-        prompt = f"""
-You are an expert planning assistant. Analyze the following user goal and create a structured execution plan.
-
-USER GOAL: {user_goal}
-
-USER CONTEXT:
-- Default Location: {user_context['default_location']}
-- Default Team Size: {user_context['team_size']}
-- Preferred Cuisines: {user_context['preferred_cuisine']}
-- Current Date: {user_context['current_date']}
-- Current Time: {user_context['current_time']}
-
-Please analyze this goal and provide:
-
-1. TASK TYPE: Classify this as one of:
-   - restaurant_booking
-   - event_planning
-   - meeting_scheduling
-   - travel_planning
-   - general_assistance
-
-2. KEY REQUIREMENTS: Extract specific requirements like:
-   - Location/venue preferences
-   - Date/time constraints
-   - Number of people involved
-   - Budget considerations
-   - Special preferences or constraints
-
-3. EXECUTION STEPS: Break down into logical steps:
-   - What research is needed?
-   - What external services to query?
-   - What user inputs are required?
-   - What final actions need to be taken?
-
-4. POTENTIAL CHALLENGES: Identify possible issues:
-   - Availability conflicts
-   - Limited options
-   - Booking difficulties
-   - Communication needs
-
-5. SUCCESS CRITERIA: Define what constitutes success:
-   - What deliverables are expected?
-   - How will we measure completion?
-
-Format your response as a structured analysis that I can parse programmatically.
-Be specific about dates, times, locations, and requirements.
-"""
-        return prompt
+        return _PLANNING_PROMPT_TEMPLATE.substitute(user_context, user_goal=user_goal)
     
     def parse_plan_analysis(self, analysis: str, original_goal: str, session_state: Dict) -> Dict:
         """Parse the LLM analysis into a structured plan"""
         
+        # Lowercase once; every extractor below matches against it
+        analysis_lower = analysis.lower()
+        
         # Extract task type
-        task_type = self.extract_task_type(analysis)
+        task_type = self.extract_task_type(analysis, analysis_lower)
         
         # Extract requirements
-        requirements = self.extract_requirements(analysis, session_state)
+        requirements = self.extract_requirements(analysis, session_state, analysis_lower)
         
         # Extract execution steps
         steps = self.extract_execution_steps(analysis)
@@ -186,48 +289,36 @@ Be specific about dates, times, locations, and requirements.
         
         return plan
     
-    def extract_task_type(self, analysis: str) -> str:
+    def extract_task_type(self, analysis: str, analysis_lower: Optional[str] = None) -> str:
         """Extract task type from analysis"""
-        task_types = [
-            "restaurant_booking",
-            "event_planning", 
-            "meeting_scheduling",
-            "travel_planning",
-            "general_assistance"
-        ]
+        if analysis_lower is None:
+            analysis_lower = analysis.lower()
         
-        analysis_lower = analysis.lower()
+        # Look for explicit task type mentions - earliest in _TASK_TYPES wins
+        mentioned = {_TASK_TYPE_NAMES[match.group(0)] for match in _TASK_TYPE_RE.finditer(analysis_lower)}
+        for task_type in _TASK_TYPES:
+            if task_type in mentioned:
+                return task_type
         
-        # Look for explicit task type mentions
-        for task_type in task_types:
-            if task_type.replace("_", " ") in analysis_lower or task_type in analysis_lower:
+        # Default classification based on keywords - one scan, then the first category in priority order
+        hits = {_TASK_KEYWORD_TYPE[match.group(1)] for match in _TASK_KEYWORD_RE.finditer(analysis_lower)}
+        for task_type, _ in _TASK_KEYWORDS:
+            if task_type in hits:
                 return task_type
         
-        # Default classification based on keywords
-        if any(word in analysis_lower for word in ["restaurant", "dinner", "lunch", "eat", "food"]):
-            return "restaurant_booking"
-        elif any(word in analysis_lower for word in ["meeting", "call", "discussion", "sync"]):
-            return "meeting_scheduling"
-        elif any(word in analysis_lower for word in ["event", "party", "celebration", "gathering"]):
-            return "event_planning"
-        elif any(word in analysis_lower for word in ["travel", "trip", "flight", "hotel"]):
-            return "travel_planning"
-        else:
-            return "general_assistance"
+        return "general_assistance"
     
-    def extract_requirements(self, analysis: str, session_state: Dict) -> Dict:
+    def extract_requirements(self, analysis: str, session_state: Dict,
+                             analysis_lower: Optional[str] = None) -> Dict:
         """Extract specific requirements from analysis"""
+        if analysis_lower is None:
+            analysis_lower = analysis.lower()
+        
         requirements = {}
         
         # Location extraction
-        location_patterns = [
-            r"location[:\s]+([^\n]+)",
-            r"in\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
-            r"at\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)"
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, analysis, re.IGNORECASE)
+        for pattern in _LOCATION_PATTERNS:
+            match = pattern.search(analysis)
             if match:
                 requirements["location"] = match.group(1).strip()
                 break
@@ -236,15 +327,8 @@ Be specific about dates, times, locations, and requirements.
             requirements["location"] = session_state.get('default_location', 'Not specified')
         
         # Party size extraction
-        size_patterns = [
-            r"(\d+)\s*people",
-            r"(\d+)\s*person",
-            r"team\s+of\s+(\d+)",
-            r"(\d+)\s*members"
-        ]
-        
-        for pattern in size_patterns:
-            match = re.search(pattern, analysis, re.IGNORECASE)
+        for pattern in _SIZE_PATTERNS:
+            match = pattern.search(analysis)
             if match:
                 requirements["party_size"] = int(match.group(1))
                 break
@@ -253,16 +337,11 @@ Be specific about dates, times, locations, and requirements.
             requirements["party_size"] = session_state.get('team_size', 6)
         
         # Time preferences
-        time_preferences = self.extract_time_preferences(analysis)
+        time_preferences = self.extract_time_preferences(analysis, analysis_lower)
         requirements["time_preferences"] = time_preferences
         
         # Cuisine preferences
-        cuisines = ["indian", "chinese", "italian", "mexican", "thai", "mediterranean", "biryani"]
-        mentioned_cuisines = []
-        
-        for cuisine in cuisines:
-            if cuisine in analysis.lower():
-                mentioned_cuisines.append(cuisine.title())
+        mentioned_cuisines = [title for cuisine, title in _CUISINE_TITLES if cuisine in analysis_lower]
         
         if mentioned_cuisines:
             requirements["cuisine"] = mentioned_cuisines
@@ -271,38 +350,33 @@ Be specific about dates, times, locations, and requirements.
         
         return requirements
     
-    def extract_time_preferences(self, analysis: str) -> List[str]:
+    def extract_time_preferences(self, analysis: str, analysis_lower: Optional[str] = None) -> List[str]:
         """Extract time preferences from analysis"""
+        if analysis_lower is None:
+            analysis_lower = analysis.lower()
+        
         time_prefs = []
         
-        # Look for specific days
-        days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-        for day in days:
-            if day in analysis.lower():
-                time_prefs.append(day.title())
+        # Look for specific days - one scan, reported in Monday..Sunday order
+        mentioned = {match.group(1) for match in _WEEKDAY_RE.finditer(analysis_lower)}
+        time_prefs.extend(day.title() for day in _WEEKDAYS if day in mentioned)
+        
+        # Read the clock once; the date lists below are all offsets from today
+        today = datetime.now().date()
+        today_ordinal = today.toordinal()
         
         # Look for relative time references
-        if "next week" in analysis.lower():
+        if "next week" in analysis_lower:
             # Generate next week dates
-            today = datetime.now()
-            next_week_start = today + timedelta(days=(7 - today.weekday()))
-            for i in range(7):
-                date = next_week_start + timedelta(days=i)
-                time_prefs.append(date.strftime("%Y-%m-%d"))
+            time_prefs.extend(_iso_dates(today_ordinal + 7 - today.weekday(), 7))
         
-        if "this week" in analysis.lower():
+        if "this week" in analysis_lower:
             # Generate this week dates
-            today = datetime.now()
-            for i in range(7):
-                date = today + timedelta(days=i)
-                time_prefs.append(date.strftime("%Y-%m-%d"))
+            time_prefs.extend(_iso_dates(today_ordinal, 7))
         
         # Default to next 7 days if nothing specified
         if not time_prefs:
-            today = datetime.now()
-            for i in range(1, 8):
-                date = today + timedelta(days=i)
-                time_prefs.append(date.strftime("%Y-%m-%d"))
+            time_prefs.extend(_iso_dates(today_ordinal + 1, 7))
         
         return time_prefs
     
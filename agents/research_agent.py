@@ -1,19 +1,80 @@
 import aiohttp
 import asyncio
+import hashlib
 from typing import Dict, List, Any, Optional
 import json
+import re
 import urllib.parse
+import numpy as np
 
 from utils.logger import setup_logger
+from utils.cache import TTLCache
+from utils.serialization import from_json
 
 logger = setup_logger(__name__)
 
+# Place Details keeps its tighter per-request timeout on the shared session
+_DETAILS_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# Only the Place Details fields get_place_details reads - name, address, types and geometry already
+# come from the search results
+_DETAILS_FIELDS = ",".join((
+    "formatted_phone_number", "website", "vicinity", "opening_hours", "photos",
+    "reviews", "price_level", "user_ratings_total", "rating"
+))
+
+# Hyderabad/Telangana place names - any substring hit in a lowercased address counts
+_HYDERABAD_INDICATORS = (
+    'hyderabad', 'telangana', 'secunderabad', 'cyberabad',
+    'gachibowli', 'hitec city', 'madhapur', 'kondapur',
+    'jubilee hills', 'banjara hills', 'begumpet', 'mehdipatnam',
+    'tolichowki', 'ameerpet', 'kukatpally', 'miyapur'
+)
+_HYDERABAD_INDICATOR_RE = re.compile("|".join(map(re.escape, _HYDERABAD_INDICATORS)))
+
+# Hyderabad bounding box (approximate)
+_HYDERABAD_LAT_RANGE = (17.2, 17.6)
+_HYDERABAD_LNG_RANGE = (78.2, 78.8)
+
+def _content_id(place_data: Dict) -> str:
+    """Stable short hash of a place's name and address - unlike hash(), the same across processes"""
+    content = f"{place_data.get('name', '')}|{place_data.get('formatted_address', '')}"
+    return hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+
 class ResearchAgent:
     """Agent responsible for researching restaurants using ONLY GoMaps API - REAL DATA ONLY"""
     
     def __init__(self, config):
         self.config = config
         self.gomaps_base_url = "https://maps.gomaps.pro/maps/api"
+        # One pooled keep-alive session per event loop, created on first request
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Place Details by place_id - the same Hyderabad places come back query after query
+        ttl = config.get("api.gomaps.details_ttl_s", 86400) if config else 86400
+        self._details_cache = TTLCache(maxsize=2048, ttl=ttl)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Shared GoMaps session - reuses TCP/TLS connections across every query and details call"""
+        loop = asyncio.get_running_loop()
+        
+        # asyncio.run() gives each request a fresh loop; a session from an earlier loop can't be reused
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(limit=32, limit_per_host=16, ttl_dns_cache=300,
+                                               keepalive_timeout=60)
+            )
+            self._session_loop = loop
+        
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
         
     async def find_restaurants(self, location: str, cuisine: Optional[List[str]], 
                              party_size: int, session_state: Dict) -> Dict:
@@ -96,41 +157,24 @@ class ResearchAgent:
                     "dining Hyderabad India"
                 ]
             
+            # The queries are independent - issue them together rather than one round-trip (plus a pause) each
+            query_results = await asyncio.gather(
+                *(self._text_search(query, api_key) for query in queries), return_exceptions=True
+            )
+            
             all_restaurants = []
+            seen_ids = set()
             
-            for query in queries:
-                logger.info(f"🌐 GoMaps query: {query}")
-                
-                url = f"{self.gomaps_base_url}/place/textsearch/json"
-                
-                params = {
-                    "query": query,
-                    "key": api_key,
-                    "type": "restaurant",
-                    "language": "en"
-                }
+            for query, results in zip(queries, query_results):
+                if isinstance(results, Exception):
+                    logger.warning(f"⚠️ Query '{query}' errored: {results}")
+                    continue
                 
-                timeout = aiohttp.ClientTimeout(total=30)
-                
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    async with session.get(url, params=params) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            
-                            if data.get("status") == "OK":
-                                results = data.get("results", [])
-                                logger.info(f"📊 Query '{query}' returned {len(results)} results")
-                                
-                                for place in results:
-                                    restaurant = self.parse_gomaps_restaurant(place)
-                                    # Add to list if not already present
-                                    if not any(r['id'] == restaurant['id'] for r in all_restaurants):
-                                        all_restaurants.append(restaurant)
-                            else:
-                                logger.warning(f"⚠️ Query '{query}' failed: {data.get('status')}")
-                
-                # Small delay between queries
-                await asyncio.sleep(0.5)
+                for restaurant in results:
+                    # Add to list if not already present
+                    if restaurant['id'] not in seen_ids:
+                        seen_ids.add(restaurant['id'])
+                        all_restaurants.append(restaurant)
             
             logger.info(f"🎉 Total unique restaurants found: {len(all_restaurants)}")
             return all_restaurants
@@ -139,6 +183,34 @@ class ResearchAgent:
             logger.error(f"💥 Search error: {str(e)}")
             return []
     
+    async def _text_search(self, query: str, api_key: str) -> List[Dict]:
+        """Run one GoMaps text search and parse its results"""
+        logger.info(f"🌐 GoMaps query: {query}")
+        
+        url = f"{self.gomaps_base_url}/place/textsearch/json"
+        
+        params = {
+            "query": query,
+            "key": api_key,
+            "type": "restaurant",
+            "language": "en"
+        }
+        
+        session = await self._get_session()
+        
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                data = from_json(await response.read())
+                
+                if data.get("status") == "OK":
+                    results = data.get("results", [])
+                    logger.info(f"📊 Query '{query}' returned {len(results)} results")
+                    return [self.parse_gomaps_restaurant(place) for place in results]
+                else:
+                    logger.warning(f"⚠️ Query '{query}' failed: {data.get('status')}")
+        
+        return []
+    
     async def search_hyderabad_specifically(self, api_key: str, cuisine: Optional[List[str]]) -> List[Dict]:
         """Backup search specifically for Hyderabad using nearby search with coordinates"""
         try:
@@ -161,30 +233,29 @@ class ResearchAgent:
             
             logger.info(f"🎯 Nearby search around Hyderabad coordinates")
             
-            timeout = aiohttp.ClientTimeout(total=30)
+            session = await self._get_session()
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    data = from_json(await response.read())
+                    
+                    if data.get("status") == "OK":
+                        results = data.get("results", [])
+                        logger.info(f"📍 Nearby search found {len(results)} restaurants")
                         
-                        if data.get("status") == "OK":
-                            results = data.get("results", [])
-                            logger.info(f"📍 Nearby search found {len(results)} restaurants")
-                            
-                            restaurants = []
-                            for place in results:
-                                restaurant = self.parse_gomaps_restaurant(place)
-                                restaurants.append(restaurant)
-                            
-                            return restaurants
-                        else:
-                            logger.warning(f"Nearby search failed: {data.get('status')}")
-                            return []
+                        restaurants = []
+                        for place in results:
+                            restaurant = self.parse_gomaps_restaurant(place)
+                            restaurants.append(restaurant)
+                        
+                        return restaurants
                     else:
-                        logger.error(f"Nearby search HTTP error: {response.status}")
+                        logger.warning(f"Nearby search failed: {data.get('status')}")
                         return []
-            
+                else:
+                    logger.error(f"Nearby search HTTP error: {response.status}")
+                    return []
+        
         except Exception as e:
             logger.error(f"Nearby search error: {str(e)}")
             return []
@@ -193,28 +264,21 @@ class ResearchAgent:
         """Filter restaurants to only include those actually in Hyderabad/Telangana"""
         hyderabad_restaurants = []
         
-        hyderabad_indicators = [
-            'hyderabad', 'telangana', 'secunderabad', 'cyberabad',
-            'gachibowli', 'hitec city', 'madhapur', 'kondapur',
-            'jubilee hills', 'banjara hills', 'begumpet', 'mehdipatnam',
-            'tolichowki', 'ameerpet', 'kukatpally', 'miyapur'
-        ]
-        
         for restaurant in restaurants:
             address = restaurant.get("address", "").lower()
             
-            # Check if any Hyderabad indicator is in the address
-            is_hyderabad = any(indicator in address for indicator in hyderabad_indicators)
-            
-            # Also check coordinates if available
+            # Coordinates are the cheaper test - only fall back to the address scan when they miss
+            is_hyderabad = False
             location = restaurant.get("location", {})
             if location and location.get("lat") and location.get("lng"):
                 lat = float(location["lat"])
                 lng = float(location["lng"])
-                
-                # Hyderabad bounding box (approximate)
-                if 17.2 <= lat <= 17.6 and 78.2 <= lng <= 78.8:
-                    is_hyderabad = True
+                is_hyderabad = (_HYDERABAD_LAT_RANGE[0] <= lat <= _HYDERABAD_LAT_RANGE[1]
+                                and _HYDERABAD_LNG_RANGE[0] <= lng <= _HYDERABAD_LNG_RANGE[1])
+            
+            # Check if any Hyderabad indicator is in the address
+            if not is_hyderabad:
+                is_hyderabad = _HYDERABAD_INDICATOR_RE.search(address) is not None
             
             if is_hyderabad:
                 logger.info(f"✅ Keeping: {restaurant['name']} - {address[:50]}...")
@@ -231,7 +295,7 @@ class ResearchAgent:
             place_address = place_data.get("formatted_address", "Unknown address")
             
             restaurant = {
-                "id": place_data.get("place_id", f"gomaps_{hash(str(place_data))}"),
+                "id": place_data["place_id"] if "place_id" in place_data else f"gomaps_{_content_id(place_data)}",
                 "name": place_name,
                 "address": place_address,
                 "rating": place_data.get("rating", 0.0),
@@ -275,7 +339,7 @@ class ResearchAgent:
         except Exception as e:
             logger.error(f"💥 Error parsing restaurant: {e}")
             return {
-                "id": f"error_{hash(str(place_data))}",
+                "id": f"error_{_content_id(place_data)}",
                 "name": place_data.get("name", "Parse Error"),
                 "address": place_data.get("formatted_address", "Address parsing failed"),
                 "rating": place_data.get("rating", 0.0),
@@ -288,133 +352,128 @@ class ResearchAgent:
     
     async def enhance_restaurants_with_details(self, restaurants: List[Dict], api_key: str) -> List[Dict]:
         """Get detailed information using Place Details API"""
-        enhanced = []
-        
         logger.info(f"🔍 Enhancing {len(restaurants)} restaurants with details...")
         
-        for i, restaurant in enumerate(restaurants):
-            place_id = restaurant.get("id")
-            if place_id and not place_id.startswith("error_"):
+        # Details lookups are independent GETs - overlap them on the shared session, capped by a semaphore
+        # instead of sleeping between calls
+        max_concurrency = self.config.get("api.gomaps.max_concurrency", 8) if self.config else 8
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(restaurant: Dict) -> Dict:
+            async with semaphore:
                 logger.info(f"📋 Getting details for {restaurant['name']}...")
-                details = await self.get_place_details(place_id, api_key)
-                if details:
-                    restaurant.update(details)
-                    logger.info(f"✅ Enhanced {restaurant['name']}")
-                else:
-                    logger.warning(f"⚠️ No additional details for {restaurant['name']}")
-                
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.3)
-            
-            enhanced.append(restaurant)
-            
-            # Progress logging
-            if (i + 1) % 3 == 0:
-                logger.info(f"📊 Enhanced {i + 1}/{len(restaurants)} restaurants")
+                return await self.get_place_details(restaurant["id"], api_key)
+        
+        to_enhance = [r for r in restaurants if r.get("id") and not r["id"].startswith("error_")]
+        all_details = await asyncio.gather(*(fetch(r) for r in to_enhance), return_exceptions=True)
         
-        logger.info(f"🎉 Enhanced all {len(enhanced)} restaurants")
-        return enhanced
+        for restaurant, details in zip(to_enhance, all_details):
+            if isinstance(details, Exception):
+                logger.warning(f"⚠️ Details lookup failed for {restaurant['name']}: {details}")
+            elif details:
+                restaurant.update(details)
+                logger.info(f"✅ Enhanced {restaurant['name']}")
+            else:
+                logger.warning(f"⚠️ No additional details for {restaurant['name']}")
+        
+        logger.info(f"🎉 Enhanced all {len(restaurants)} restaurants")
+        return list(restaurants)
     
     async def get_place_details(self, place_id: str, api_key: str) -> Dict:
         """Get detailed place information using GoMaps Place Details API"""
+        cached = self._details_cache.get(place_id)
+        if cached is not None:
+            return dict(cached)
+        
         try:
             url = f"{self.gomaps_base_url}/place/details/json"
             
-            # Request comprehensive details
-            fields = [
-                "name", "rating", "formatted_phone_number", "formatted_address", 
-                "opening_hours", "website", "photos", "reviews", "price_level",
-                "types", "user_ratings_total", "geometry", "business_status",
-                "vicinity", "plus_code"
-            ]
-            
             params = {
                 "place_id": place_id,
                 "key": api_key,
-                "fields": ",".join(fields),
+                "fields": _DETAILS_FIELDS,
                 "language": "en"
             }
             
-            timeout = aiohttp.ClientTimeout(total=15)
+            session = await self._get_session()
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            async with session.get(url, params=params, timeout=_DETAILS_TIMEOUT) as response:
+                if response.status == 200:
+                    data = from_json(await response.read())
+                    
+                    if data.get("status") == "OK":
+                        result = data.get("result", {})
                         
-                        if data.get("status") == "OK":
-                            result = data.get("result", {})
-                            
-                            details = {}
-                            
-                            # Contact information
-                            if "formatted_phone_number" in result:
-                                details["phone"] = result["formatted_phone_number"]
-                            if "website" in result:
-                                details["website"] = result["website"]
-                            
-                            # Enhanced address info
-                            if "vicinity" in result:
-                                details["vicinity"] = result["vicinity"]
-                            if "plus_code" in result:
-                                details["plus_code"] = result["plus_code"]
-                            
-                            # Opening hours
-                            if "opening_hours" in result:
-                                opening_hours = result["opening_hours"]
-                                details["opening_hours"] = opening_hours
-                                details["open_now"] = opening_hours.get("open_now", False)
-                                
-                                # Extract weekday text for display
-                                weekday_text = opening_hours.get("weekday_text", [])
-                                if weekday_text:
-                                    details["hours_display"] = weekday_text
-                            
-                            # Photos
-                            if "photos" in result:
-                                photos = result["photos"]
-                                details["photos"] = photos
-                                if photos:
-                                    details["photo_reference"] = photos[0].get("photo_reference")
-                            
-                            # Reviews with proper parsing
-                            if "reviews" in result:
-                                reviews = result["reviews"]
-                                details["reviews_data"] = reviews
-                                
-                                # Extract review texts
-                                review_texts = []
-                                for review in reviews[:5]:  # Top 5 reviews
-                                    text = review.get("text", "")
-                                    author = review.get("author_name", "Anonymous")
-                                    rating = review.get("rating", 0)
-                                    review_texts.append({
-                                        "text": text[:200] + "..." if len(text) > 200 else text,
-                                        "author": author,
-                                        "rating": rating
-                                    })
-                                
-                                details["recent_reviews"] = review_texts
+                        details = {}
+                        
+                        # Contact information
+                        if "formatted_phone_number" in result:
+                            details["phone"] = result["formatted_phone_number"]
+                        if "website" in result:
+                            details["website"] = result["website"]
+                        
+                        # Enhanced address info
+                        if "vicinity" in result:
+                            details["vicinity"] = result["vicinity"]
+                        
+                        # Opening hours
+                        if "opening_hours" in result:
+                            opening_hours = result["opening_hours"]
+                            details["opening_hours"] = opening_hours
+                            details["open_now"] = opening_hours.get("open_now", False)
                             
-                            # Update price level
-                            if "price_level" in result:
-                                details["price_level"] = result["price_level"]
-                                details["price_range"] = self.convert_price_level(result["price_level"])
+                            # Extract weekday text for display
+                            weekday_text = opening_hours.get("weekday_text", [])
+                            if weekday_text:
+                                details["hours_display"] = weekday_text
+                        
+                        # Photos
+                        if "photos" in result:
+                            photos = result["photos"]
+                            details["photos"] = photos
+                            if photos:
+                                details["photo_reference"] = photos[0].get("photo_reference")
+                        
+                        # Reviews with proper parsing
+                        if "reviews" in result:
+                            reviews = result["reviews"]
+                            details["reviews_data"] = reviews
                             
-                            # Update ratings info
-                            if "user_ratings_total" in result:
-                                details["user_ratings_total"] = result["user_ratings_total"]
-                            if "rating" in result:
-                                details["rating"] = result["rating"]
+                            # Extract review texts
+                            review_texts = []
+                            for review in reviews[:5]:  # Top 5 reviews
+                                text = review.get("text", "")
+                                author = review.get("author_name", "Anonymous")
+                                rating = review.get("rating", 0)
+                                review_texts.append({
+                                    "text": text[:200] + "..." if len(text) > 200 else text,
+                                    "author": author,
+                                    "rating": rating
+                                })
                             
-                            return details
-                        else:
-                            logger.warning(f"Place details failed for {place_id}: {data.get('status')}")
-                            return {}
+                            details["recent_reviews"] = review_texts
+                        
+                        # Update price level
+                        if "price_level" in result:
+                            details["price_level"] = result["price_level"]
+                            details["price_range"] = self.convert_price_level(result["price_level"])
+                        
+                        # Update ratings info
+                        if "user_ratings_total" in result:
+                            details["user_ratings_total"] = result["user_ratings_total"]
+                        if "rating" in result:
+                            details["rating"] = result["rating"]
+                        
+                        # Only successful lookups are cached; failures may be transient
+                        self._details_cache.set(place_id, details)
+                        return dict(details)
                     else:
-                        logger.error(f"Place details HTTP {response.status} for {place_id}")
+                        logger.warning(f"Place details failed for {place_id}: {data.get('status')}")
                         return {}
-                        
+                else:
+                    logger.error(f"Place details HTTP {response.status} for {place_id}")
+                    return {}
+                    
         except Exception as e:
             logger.error(f"Error getting details for {place_id}: {str(e)}")
             return {}
@@ -476,56 +535,44 @@ class ResearchAgent:
     def rank_restaurants(self, restaurants: List[Dict], preferred_cuisine: Optional[List[str]], 
                         party_size: int) -> List[Dict]:
         """Rank restaurants ensuring variety"""
+        preferred = [c.lower() for c in preferred_cuisine] if preferred_cuisine else []
         
-        def calculate_score(restaurant: Dict) -> float:
-            score = 0.0
-            
-            # Rating weight (40%)
-            rating = restaurant.get("rating", 0)
-            if rating > 0:
-                score += (rating / 5.0) * 0.4
-            
+        def cuisine_bonus(restaurant: Dict) -> float:
             # Cuisine match (25%)
-            if preferred_cuisine:
-                restaurant_cuisines = [c.lower() for c in restaurant.get("cuisine", [])]
-                matches = 0
-                for preferred in preferred_cuisine:
-                    preferred_lower = preferred.lower()
-                    if preferred_lower in restaurant_cuisines:
-                        matches += 1
-                    elif 'biryani' in preferred_lower and 'indian' in restaurant_cuisines:
-                        matches += 1
-                
-                if matches > 0:
-                    score += min(0.25, matches * 0.1)
-            
-            # Review count (20%)
-            review_count = restaurant.get("user_ratings_total", 0)
-            if review_count > 1000:
-                score += 0.20
-            elif review_count > 500:
-                score += 0.15
-            elif review_count > 100:
-                score += 0.10
-            elif review_count > 50:
-                score += 0.05
-            
-            # Business status (10%)
-            if restaurant.get("business_status") == "OPERATIONAL":
-                score += 0.10
-            
-            # Open now (5%)
-            if restaurant.get("open_now") is True:
-                score += 0.05
-            
-            return score
-        
-        # Score all restaurants
-        for restaurant in restaurants:
-            restaurant["score"] = calculate_score(restaurant)
+            restaurant_cuisines = [c.lower() for c in restaurant.get("cuisine", [])]
+            matches = 0
+            for preferred_lower in preferred:
+                if preferred_lower in restaurant_cuisines:
+                    matches += 1
+                elif 'biryani' in preferred_lower and 'indian' in restaurant_cuisines:
+                    matches += 1
+            
+            return min(0.25, matches * 0.1) if matches > 0 else 0.0
+        
+        # Pull every scoring input out of the dicts once, then score all restaurants together
+        ratings = np.array([r.get("rating", 0) for r in restaurants], dtype=np.float64)
+        review_counts = np.array([r.get("user_ratings_total", 0) for r in restaurants], dtype=np.float64)
+        operational = np.array([r.get("business_status") == "OPERATIONAL" for r in restaurants], dtype=bool)
+        open_now = np.array([r.get("open_now") is True for r in restaurants], dtype=bool)
+        
+        # Rating weight (40%)
+        scores = np.where(ratings > 0, (ratings / 5.0) * 0.4, 0.0)
+        if preferred:
+            scores += np.array([cuisine_bonus(r) for r in restaurants], dtype=np.float64)
+        # Review count (20%)
+        scores += np.select(
+            [review_counts > 1000, review_counts > 500, review_counts > 100, review_counts > 50],
+            [0.20, 0.15, 0.10, 0.05], 0.0
+        )
+        # Business status (10%) and open now (5%)
+        scores += np.where(operational, 0.10, 0.0)
+        scores += np.where(open_now, 0.05, 0.0)
+        
+        for restaurant, score in zip(restaurants, scores.tolist()):
+            restaurant["score"] = score
         
-        # Sort by score descending
-        ranked = sorted(restaurants, key=lambda x: x["score"], reverse=True)
+        # Sort by score descending - a stable sort on the negated scores keeps ties in input order
+        ranked = [restaurants[i] for i in np.argsort(-scores, kind="stable")]
         
         # Ensure variety by removing duplicates with same name
         unique_restaurants = []
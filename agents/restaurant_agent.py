@@ -6,9 +6,39 @@ from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Place types too generic to show as a cuisine
+_GENERIC_PLACE_TYPES = frozenset(["point_of_interest", "establishment"])
+
 class RestaurantAgent:
     def __init__(self, config):
         self.config = config
+        # One pooled keep-alive GoMaps session per event loop, created on first request
+        self._session = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def _get_session(self):
+        """Shared GoMaps session - the search and every details lookup reuse its connections"""
+        import aiohttp
+        
+        loop = asyncio.get_running_loop()
+        
+        # asyncio.run() gives each request a fresh loop; a session from an earlier loop can't be reused
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(limit=32, limit_per_host=16, ttl_dns_cache=300,
+                                               keepalive_timeout=60)
+            )
+            self._session_loop = loop
+        
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
         
     async def search_restaurants(self, location: str, cuisine: List[str] = None, party_size: int = 6, session_state: Dict = None) -> Dict:
         """Search for restaurants based on criteria"""
@@ -29,8 +59,6 @@ class RestaurantAgent:
     async def search_real_restaurants(self, location: str, cuisine: List[str], party_size: int, session_state: Dict) -> Dict:
         """Search for real restaurants using GoMaps API with unique results"""
         try:
-            import aiohttp
-            
             gomaps_key = session_state.get('gomaps_key')
             
             # Prepare search query
@@ -52,76 +80,72 @@ class RestaurantAgent:
             restaurants = []
             seen_places = set()  # Track unique places by place_id
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, params=search_params) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            session = await self._get_session()
+            
+            async with session.get(search_url, params=search_params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    
+                    if data.get("status") == "OK":
+                        places = data.get("results", [])
                         
-                        if data.get("status") == "OK":
-                            places = data.get("results", [])
+                        for place in places:
+                            place_id = place.get("place_id")
                             
-                            for place in places:
-                                place_id = place.get("place_id")
-                                
-                                # Skip if we've already seen this place
-                                if place_id in seen_places:
-                                    continue
-                                seen_places.add(place_id)
-                                
-                                # Skip if we have enough restaurants
-                                if len(restaurants) >= 8:
-                                    break
-                                
-                                restaurant = {
-                                    "name": place.get("name", "Unknown Restaurant"),
-                                    "address": place.get("formatted_address", "Address not available"),
-                                    "rating": place.get("rating", 0),
-                                    "user_ratings_total": place.get("user_ratings_total", 0),
-                                    "price_level": place.get("price_level", 2),
-                                    "place_id": place_id,
-                                    "source": "gomaps_api",
-                                    "location": {
-                                        "lat": place.get("geometry", {}).get("location", {}).get("lat"),
-                                        "lng": place.get("geometry", {}).get("location", {}).get("lng")
-                                    }
-                                }
-                                
-                                # Add cuisine types (clean them up)
-                                types = place.get("types", ["restaurant"])
-                                clean_cuisine = [t.replace("_", " ").title() for t in types if t not in ["point_of_interest", "establishment"]]
-                                restaurant["cuisine"] = clean_cuisine[:3] if clean_cuisine else ["Restaurant"]
-                                
-                                # Convert price level to range
-                                price_levels = {
-                                    1: "₹ (Budget)",
-                                    2: "₹₹ (Moderate)", 
-                                    3: "₹₹₹ (Expensive)",
-                                    4: "₹₹₹₹ (Very Expensive)"
+                            # Skip if we've already seen this place
+                            if place_id in seen_places:
+                                continue
+                            seen_places.add(place_id)
+                            
+                            # Skip if we have enough restaurants
+                            if len(restaurants) >= 8:
+                                break
+                            
+                            restaurant = {
+                                "name": place.get("name", "Unknown Restaurant"),
+                                "address": place.get("formatted_address", "Address not available"),
+                                "rating": place.get("rating", 0),
+                                "user_ratings_total": place.get("user_ratings_total", 0),
+                                "price_level": place.get("price_level", 2),
+                                "place_id": place_id,
+                                "source": "gomaps_api",
+                                "location": {
+                                    "lat": place.get("geometry", {}).get("location", {}).get("lat"),
+                                    "lng": place.get("geometry", {}).get("location", {}).get("lng")
                                 }
-                                restaurant["price_range"] = price_levels.get(restaurant["price_level"], "₹₹ (Moderate)")
-                                
-                                # Check if open now
-                                restaurant["open_now"] = place.get("opening_hours", {}).get("open_now", False)
-                                
-                                # Get photo reference if available
-                                photos = place.get("photos", [])
-                                if photos:
-                                    restaurant["photo_reference"] = photos[0].get("photo_reference")
-                                
-                                # Get additional details (phone, website, reviews)
-                                details = await self.get_place_details(place_id, gomaps_key)
-                                if details:
-                                    restaurant.update(details)
-                                
-                                restaurants.append(restaurant)
-                        
-                        else:
-                            logger.warning(f"GoMaps API returned status: {data.get('status')}")
-                            return await self.search_mock_restaurants(location, cuisine, party_size)
+                            }
+                            
+                            # Add cuisine types (clean them up)
+                            types = place.get("types", ["restaurant"])
+                            clean_cuisine = [t.replace("_", " ").title() for t in types if t not in _GENERIC_PLACE_TYPES]
+                            restaurant["cuisine"] = clean_cuisine[:3] if clean_cuisine else ["Restaurant"]
+                            
+                            # Convert price level to range
+                            price_levels = {
+                                1: "₹ (Budget)",
+                                2: "₹₹ (Moderate)", 
+                                3: "₹₹₹ (Expensive)",
+                                4: "₹₹₹₹ (Very Expensive)"
+                            }
+                            restaurant["price_range"] = price_levels.get(restaurant["price_level"], "₹₹ (Moderate)")
+                            
+                            # Check if open now
+                            restaurant["open_now"] = place.get("opening_hours", {}).get("open_now", False)
+                            
+                            # Get photo reference if available
+                            photos = place.get("photos", [])
+                            if photos:
+                                restaurant["photo_reference"] = photos[0].get("photo_reference")
+                            
+                            restaurants.append(restaurant)
                     
                     else:
-                        logger.warning(f"GoMaps API request failed: {response.status}")
+                        logger.warning(f"GoMaps API returned status: {data.get('status')}")
                         return await self.search_mock_restaurants(location, cuisine, party_size)
+                
+                else:
+                    logger.warning(f"GoMaps API request failed: {response.status}")
+                    return await self.search_mock_restaurants(location, cuisine, party_size)
             
             if restaurants:
                 # Sort by rating and ensure uniqueness
@@ -137,6 +161,20 @@ class RestaurantAgent:
                         seen_names.add(name_key)
                         unique_restaurants.append(restaurant)
                 
+                # Get additional details (phone, website, reviews) only for the restaurants that
+                # survived ranking and dedup - overlapped on the shared session, capped by a semaphore
+                max_concurrency = self.config.get("api.gomaps.max_concurrency", 8) if self.config else 8
+                semaphore = asyncio.Semaphore(max_concurrency)
+                
+                async def fetch(restaurant: Dict) -> Dict:
+                    async with semaphore:
+                        return await self.get_place_details(restaurant["place_id"], gomaps_key)
+                
+                all_details = await asyncio.gather(*(fetch(restaurant) for restaurant in unique_restaurants))
+                for restaurant, details in zip(unique_restaurants, all_details):
+                    if details:
+                        restaurant.update(details)
+                
                 return {
                     "success": True,
                     "restaurants": unique_restaurants,
@@ -154,8 +192,6 @@ class RestaurantAgent:
     async def get_place_details(self, place_id: str, api_key: str) -> Dict:
         """Get additional details for a place including reviews"""
         try:
-            import aiohttp
-            
             details_url = "https://maps.gomaps.pro/maps/api/place/details/json"
             details_params = {
                 "place_id": place_id,
@@ -163,66 +199,67 @@ class RestaurantAgent:
                 "key": api_key
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(details_url, params=details_params) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            session = await self._get_session()
+            
+            async with session.get(details_url, params=details_params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    
+                    if data.get("status") == "OK":
+                        result = data.get("result", {})
                         
-                        if data.get("status") == "OK":
-                            result = data.get("result", {})
-                            
-                            details = {}
-                            
-                            # Phone number
-                            if result.get("formatted_phone_number"):
-                                details["phone"] = result["formatted_phone_number"]
-                            
-                            # Website
-                            if result.get("website"):
-                                details["website"] = result["website"]
-                            
-                            # Business status
-                            if result.get("business_status"):
-                                details["business_status"] = result["business_status"]
-                            
-                            # Opening hours
-                            opening_hours = result.get("opening_hours", {})
-                            if opening_hours:
-                                details["opening_hours"] = opening_hours.get("weekday_text", [])
-                                details["open_now"] = opening_hours.get("open_now", False)
-                            
-                            # Reviews - Enhanced with proper formatting
-                            reviews = result.get("reviews", [])
-                            if reviews:
-                                formatted_reviews = []
-                                for review in reviews[:5]:  # Get top 5 reviews
-                                    formatted_review = {
-                                        "author": review.get("author_name", "Anonymous"),
-                                        "rating": review.get("rating", 0),
-                                        "text": review.get("text", "No review text"),
-                                        "time": review.get("relative_time_description", "Recently"),
-                                        "profile_photo": review.get("profile_photo_url", "")
-                                    }
-                                    
-                                    # Clean up review text - limit length but don't cut off mid-sentence
-                                    review_text = formatted_review["text"]
-                                    if len(review_text) > 150:
-                                        # Find last sentence ending before 150 chars
-                                        truncate_at = 150
-                                        for i in range(min(150, len(review_text)), 0, -1):
-                                            if review_text[i] in '.!?':
-                                                truncate_at = i + 1
-                                                break
-                                        formatted_review["text"] = review_text[:truncate_at].strip()
-                                        if not formatted_review["text"].endswith(('.', '!', '?')):
-                                            formatted_review["text"] += "..."
-                                    
-                                    formatted_reviews.append(formatted_review)
+                        details = {}
+                        
+                        # Phone number
+                        if result.get("formatted_phone_number"):
+                            details["phone"] = result["formatted_phone_number"]
+                        
+                        # Website
+                        if result.get("website"):
+                            details["website"] = result["website"]
+                        
+                        # Business status
+                        if result.get("business_status"):
+                            details["business_status"] = result["business_status"]
+                        
+                        # Opening hours
+                        opening_hours = result.get("opening_hours", {})
+                        if opening_hours:
+                            details["opening_hours"] = opening_hours.get("weekday_text", [])
+                            details["open_now"] = opening_hours.get("open_now", False)
+                        
+                        # Reviews - Enhanced with proper formatting
+                        reviews = result.get("reviews", [])
+                        if reviews:
+                            formatted_reviews = []
+                            for review in reviews[:5]:  # Get top 5 reviews
+                                formatted_review = {
+                                    "author": review.get("author_name", "Anonymous"),
+                                    "rating": review.get("rating", 0),
+                                    "text": review.get("text", "No review text"),
+                                    "time": review.get("relative_time_description", "Recently"),
+                                    "profile_photo": review.get("profile_photo_url", "")
+                                }
+                                
+                                # Clean up review text - limit length but don't cut off mid-sentence
+                                review_text = formatted_review["text"]
+                                if len(review_text) > 150:
+                                    # Find last sentence ending before 150 chars
+                                    truncate_at = 150
+                                    for i in range(min(150, len(review_text)), 0, -1):
+                                        if review_text[i] in '.!?':
+                                            truncate_at = i + 1
+                                            break
+                                    formatted_review["text"] = review_text[:truncate_at].strip()
+                                    if not formatted_review["text"].endswith(('.', '!', '?')):
+                                        formatted_review["text"] += "..."
                                 
-                                details["recent_reviews"] = formatted_reviews
-                                details["review_count"] = len(reviews)
+                                formatted_reviews.append(formatted_review)
                             
-                            return details
+                            details["recent_reviews"] = formatted_reviews
+                            details["review_count"] = len(reviews)
+                        
+                        return details
             
             return {}
             
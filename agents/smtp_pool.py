@@ -0,0 +1,130 @@
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def connection_lost(error: Exception) -> bool:
+    """True when an SMTP error means the server dropped or is closing the connection"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == 421
+
+class SMTPConnectionPool:
+    """Keeps warm, authenticated SMTP connections keyed by (host, port, user)"""
+
+    def __init__(self, max_idle: float = 90, reap_after: float = 100, reap_interval: float = 30,
+                 probe_after: float = 5):
+        self.max_idle = max_idle
+        self.probe_after = probe_after
+        self.reap_after = reap_after
+        self.reap_interval = reap_interval
+        self._lock = threading.Lock()
+        self._connections: Dict[Tuple, Tuple[smtplib.SMTP, float]] = {}
+        self._reaper = None
+
+    @contextmanager
+    def acquire(self, host: str, port: int, user: str, password: str):
+        """Check out a connection for the duration of the block, then return it to the pool"""
+        key = (host, port, user)
+        server = self._get(key, password)
+
+        try:
+            yield server
+        except Exception as error:
+            # A dropped connection can't be reset or reused
+            if connection_lost(error):
+                self._close(server)
+                raise
+            # Clear any half-finished transaction before the connection is reused
+            try:
+                server.rset()
+            except (smtplib.SMTPException, OSError):
+                self._close(server)
+                raise
+            self._release(key, server)
+            raise
+        else:
+            self._release(key, server)
+
+    def close_all(self):
+        """Quit every pooled connection"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+
+        for server, _ in connections:
+            self._close(server)
+
+    def _get(self, key: Tuple, password: str) -> smtplib.SMTP:
+        """Reuse a live pooled connection or open a new one"""
+        with self._lock:
+            entry = self._connections.pop(key, None)
+
+        if entry:
+            server, last_used = entry
+            idle = time.monotonic() - last_used
+            # Staleness window: connections released under probe_after seconds ago are handed out
+            # unprobed; older ones pay a NOOP round-trip. If the server dropped one anyway,
+            # acquire() discards it and the sender reconnects once
+            if idle < self.max_idle and (idle < self.probe_after or self._is_alive(server)):
+                return server
+            self._close(server)
+
+        host, port, user = key
+        server = smtplib.SMTP(host, port)
+        server.starttls()
+        server.login(user, password)
+        logger.info(f"Opened SMTP connection to {host}:{port} for {user}")
+        return server
+
+    def _release(self, key: Tuple, server: smtplib.SMTP):
+        """Return a connection to the pool, keeping only one per key"""
+        with self._lock:
+            previous = self._connections.get(key)
+            self._connections[key] = (server, time.monotonic())
+
+        if previous:
+            self._close(previous[0])
+
+        self._ensure_reaper()
+
+    def _is_alive(self, server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _close(self, server: smtplib.SMTP):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _ensure_reaper(self):
+        """Start the background thread that closes idle connections"""
+        with self._lock:
+            if self._reaper and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_idle, name="smtp-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_idle(self):
+        while True:
+            time.sleep(self.reap_interval)
+            now = time.monotonic()
+
+            with self._lock:
+                idle_keys = [key for key, (_, last_used) in self._connections.items()
+                             if now - last_used > self.reap_after]
+                idle = [self._connections.pop(key)[0] for key in idle_keys]
+
+            for server in idle:
+                self._close(server)
+
+# Shared by all email senders in the process
+smtp_pool = SMTPConnectionPool()
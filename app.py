@@ -1129,7 +1129,7 @@ class WorkLifeAssistantApp:
             
             # Test with your email (A4xMimic's calendar)
             test_email = st.session_state.get('email_address', 'clips7621@gmail.com')
-            test_date = (self.current_time + timedelta(days=1)).strftime('%Y-%m-%d')
+            test_date = (self.current_time + timedelta(days=1)).date().isoformat()
             
             # Make a real API call
             freebusy_result = service.freebusy().query(
@@ -2575,7 +2575,7 @@ class WorkLifeAssistantApp:
                 with st.spinner("📅 Analyzing team availability with smart recommendations..."):
                     availability_result = asyncio.run(
                         self.check_real_team_availability(
-                            selected_date.strftime("%Y-%m-%d"), 
+                            selected_date.isoformat(), 
                             st.session_state['team_emails'][:party_size]
                         )
                     )
@@ -2638,7 +2638,7 @@ class WorkLifeAssistantApp:
                     if st.button(f"🔧 Selenium Auto-Book", key=f"confirm_selenium_booking_{message_id}", type="primary", use_container_width=True):
                         # FIXED: Create updated time slot BEFORE processing
                         updated_time_slot = {
-                            "date": selected_date.strftime("%Y-%m-%d"),
+                            "date": selected_date.isoformat(),
                             "time": selected_time,
                             "available_attendees": party_size,
                             "total_attendees": party_size,
@@ -2669,7 +2669,7 @@ class WorkLifeAssistantApp:
                     if st.button(f"📞 Manual Booking", key=f"confirm_manual_booking_{message_id}", use_container_width=True):
                         # Update the time slot with user selections
                         updated_time_slot = {
-                            "date": selected_date.strftime("%Y-%m-%d"),
+                            "date": selected_date.isoformat(),
                             "time": selected_time,
                             "available_attendees": party_size,
                             "total_attendees": party_size,
@@ -2699,7 +2699,7 @@ class WorkLifeAssistantApp:
                     if st.button(f"✅ Confirm Booking", key=f"confirm_booking_{message_id}", type="primary", use_container_width=True):
                         # Update the time slot with user selections
                         updated_time_slot = {
-                            "date": selected_date.strftime("%Y-%m-%d"),
+                            "date": selected_date.isoformat(),
                             "time": selected_time,
                             "available_attendees": party_size,
                             "total_attendees": party_size,
@@ -2937,7 +2937,7 @@ class WorkLifeAssistantApp:
                     "🔧 **Selenium automation log available** for technical review",
                     "📸 **Screenshot captured** of final booking state",
                     "🍽️ **Enjoy your Selenium-automated dining experience!**",
-                    f"⏰ **Selenium booking completed at:** {self.current_time.strftime('%H:%M:%S')} UTC on {self.current_time.strftime('%Y-%m-%d')}"
+                    f"⏰ **Selenium booking completed at:** {self.current_time.strftime('%H:%M:%S')} UTC on {self.current_time.date().isoformat()}"
                 ]
                 
                 for step in steps:
@@ -3028,7 +3028,7 @@ class WorkLifeAssistantApp:
                     "📍 Save restaurant contact information",
                     "🍽️ Prepare for your team dinner!",
                     "📸 Don't forget to take photos and share the experience!",
-                    f"⏰ **Reminder:** Manual booking processed at {self.current_time.strftime('%H:%M:%S')} UTC on {self.current_time.strftime('%Y-%m-%d')}"
+                    f"⏰ **Reminder:** Manual booking processed at {self.current_time.strftime('%H:%M:%S')} UTC on {self.current_time.date().isoformat()}"
                 ]
                 
                 for step in steps:
@@ -4,16 +4,23 @@ Utility modules for the Proactive Work-Life Assistant
 This package contains utility functions and classes for:
 - Configuration management
 - Logging setup and management
+- In-memory TTL caching
+- Fast JSON serialization
 - Common helper functions
 """
 
 from .config import Config
 from .logger import setup_logger, log_function_call
+from .cache import TTLCache
+from .serialization import to_json, from_json
 
 __all__ = [
     'Config',
     'setup_logger', 
-    'log_function_call'
+    'log_function_call',
+    'TTLCache',
+    'to_json',
+    'from_json'
 ]
 
 __version__ = "1.0.0"
\ No newline at end of file
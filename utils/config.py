@@ -44,16 +44,24 @@ class Config:
                 "gomaps": {
                     "base_url": "https://maps.gomaps.pro/maps/api",
                     "radius_default": 5000,
-                    "max_results": 20
+                    "max_results": 20,
+                    "max_concurrency": 8,
+                    "details_ttl_s": 86400
                 },
                 "calendar": {
                     "scopes": [
                         "https://www.googleapis.com/auth/calendar",
                         "https://www.googleapis.com/auth/calendar.events"
                     ],
-                    "timezone": "Asia/Kolkata"
+                    "timezone": "Asia/Kolkata",
+                    "max_concurrency": 3,
+                    "availability_ttl_s": 60
                 }
             },
+            "communication": {
+                "max_concurrent_sends": 16,
+                "simulate_email_delay_s": 0.0
+            },
             "automation": {
                 "selenium": {
                     "implicit_wait": 10,
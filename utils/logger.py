@@ -41,11 +41,15 @@ def log_function_call(func):
     """Decorator to log function calls"""
     def wrapper(*args, **kwargs):
         logger = logging.getLogger(func.__module__)
-        logger.debug(f"Calling {func.__name__} with args={args}, kwargs={kwargs}")
+        # repr() of the arguments can be large - only build it when DEBUG is actually on
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Calling %s with args=%s, kwargs=%s", func.__name__, args, kwargs)
         
         try:
             result = func(*args, **kwargs)
-            logger.debug(f"{func.__name__} completed successfully")
+            if debug:
+                logger.debug("%s completed successfully", func.__name__)
             return result
         except Exception as e:
             logger.error(f"{func.__name__} failed with error: {str(e)}")
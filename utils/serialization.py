@@ -0,0 +1,11 @@
+from typing import Any
+
+import orjson
+
+def to_json(obj: Any) -> bytes:
+    """Serialize plain JSON data (e.g. OAuth client secrets) to JSON bytes"""
+    return orjson.dumps(obj)
+
+def from_json(data) -> Any:
+    """Parse JSON from str, bytes or a memoryview"""
+    return orjson.loads(data)